@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark for ThreadedZipCracker
+Builds encrypted test archives and wordlists locally with known passwords,
+runs every backend/worker/buffer combination and reports JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import struct
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+import io
+import zlib
+import hashlib
+import hmac
+
+from utils import (ThreadedZipCracker, BruteForceKeyspace, Backend, VerifierBackend,
+                   WinZipAESCTR, CRC_TABLE, AES_EXTRA_ID, AES_KEY_LENGTHS, AES_COMPRESS_TYPE,
+                   _LOCAL_HEADER, _LOCAL_HEADER_MAGIC)
+
+try:
+    import resource
+except ImportError:
+    # Windows: no getrusage, RSS and CPU fields are reported as null
+    resource = None
+
+# Fixed timestamp so the same seed always builds byte-identical archives
+_DOS_TIME = (0 << 11) | (0 << 5) | 0
+_DOS_DATE = ((2024 - 1980) << 9) | (1 << 5) | 1
+
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_END_OF_CENTRAL_DIR = struct.Struct("<4s4H2LH")
+
+def _zipcrypto_encrypt(data: bytes, password: bytes) -> bytes:
+    """Traditional PKWARE stream encryption (APPNOTE 6.1)"""
+    table = CRC_TABLE
+    k0, k1, k2 = 0x12345678, 0x23456789, 0x34567890
+    for c in password:
+        k0 = (k0 >> 8) ^ table[(k0 ^ c) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ table[(k2 ^ (k1 >> 24)) & 0xFF]
+    
+    out = bytearray()
+    for c in data:
+        t = (k2 | 2) & 0xFFFF
+        out.append(c ^ (((t * (t ^ 1)) >> 8) & 0xFF))
+        k0 = (k0 >> 8) ^ table[(k0 ^ c) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ table[(k2 ^ (k1 >> 24)) & 0xFF]
+    return bytes(out)
+
+def _deflate(data: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+def _write_zip(path: str, entries: list):
+    """entries: (name, method, flags, crc, payload, file_size, extra, version)"""
+    local_parts = []
+    central_parts = []
+    offset = 0
+    for name, method, flags, crc, payload, file_size, extra, version in entries:
+        name_bytes = name.encode('ascii')
+        local = _LOCAL_HEADER.pack(_LOCAL_HEADER_MAGIC, version, 0, flags, method, _DOS_TIME, _DOS_DATE,
+                                   crc, len(payload), file_size, len(name_bytes), len(extra))
+        local_parts.append(local + name_bytes + extra + payload)
+        central_parts.append(_CENTRAL_HEADER.pack(
+            b"PK\001\002", version, 3, version, 0, flags, method, _DOS_TIME, _DOS_DATE,
+            crc, len(payload), file_size, len(name_bytes), len(extra), 0, 0, 0, 0o100644 << 16, offset
+        ) + name_bytes + extra)
+        offset += len(local_parts[-1])
+    
+    central = b"".join(central_parts)
+    end = _END_OF_CENTRAL_DIR.pack(b"PK\005\006", 0, 0, len(entries), len(entries),
+                                   len(central), offset, 0)
+    with open(path, 'wb') as f:
+        f.write(b"".join(local_parts) + central + end)
+
+def write_zipcrypto_zip(path: str, files: dict, password: bytes, rng: random.Random):
+    """Deflated members encrypted with traditional ZipCrypto"""
+    entries = []
+    for name, data in files.items():
+        crc = zlib.crc32(data)
+        header = bytes(rng.randrange(256) for _ in range(11)) + bytes([crc >> 24])
+        payload = _zipcrypto_encrypt(header + _deflate(data), password)
+        entries.append((name, 8, 0x1, crc, payload, len(data), b"", 20))
+    _write_zip(path, entries)
+
+def write_aes_zip(path: str, files: dict, password: bytes, rng: random.Random, strength: int = 3):
+    """Deflated members encrypted with WinZip AE-2"""
+    key_length = AES_KEY_LENGTHS[strength]
+    extra = struct.pack("<HHH2sBH", AES_EXTRA_ID, 7, 2, b"AE", strength, 8)
+    entries = []
+    for name, data in files.items():
+        salt = bytes(rng.randrange(256) for _ in range(key_length // 2))
+        key = hashlib.pbkdf2_hmac('sha1', password, salt, 1000, 2 * key_length + 2)
+        ciphertext = WinZipAESCTR(key[:key_length]).process(_deflate(data))
+        auth = hmac.new(key[key_length:2 * key_length], ciphertext, hashlib.sha1).digest()[:10]
+        payload = salt + key[2 * key_length:] + ciphertext + auth
+        
+        # AE-2 leaves the CRC field zero
+        entries.append((name, AES_COMPRESS_TYPE, 0x1, 0, payload, len(data), extra, 51))
+    _write_zip(path, entries)
+
+def _random_word(rng: random.Random, chars: str, low: int = 4, high: int = 10) -> str:
+    return "".join(rng.choice(chars) for _ in range(rng.randint(low, high)))
+
+def build_case(case: str, workdir: str, args, rng: random.Random) -> dict:
+    """Create the archive (and wordlist) for one case, password at the chosen position"""
+    encryption, attack = case.split(":")
+    keyspace = BruteForceKeyspace(args.length, args.charset)
+    
+    if attack == "bruteforce":
+        index = min(keyspace.size - 1, int(keyspace.size * args.position))
+        password = keyspace.candidate(index)
+        wordlist = None
+    else:
+        # Wordlist words never collide with the password, which sits at the chosen line
+        words = [_random_word(rng, "abcdefghijklmnopqrstuvwxyz") for _ in range(args.words)]
+        index = min(len(words), int(len(words) * args.position))
+        password = b"Bench-Pass-1"
+        words.insert(index, password.decode())
+        wordlist = os.path.join(workdir, f"{encryption}-{attack}.txt")
+        with open(wordlist, 'w', encoding='utf-8') as f:
+            f.write("\n".join(words) + "\n")
+    
+    files = {
+        "notes.txt": ("benchmark payload\n" * 200).encode(),
+        "data.bin": bytes(rng.randrange(256) for _ in range(args.payload_kb * 1024)),
+    }
+    archive = os.path.join(workdir, f"{encryption}-{attack}.zip")
+    if encryption == "aes":
+        write_aes_zip(archive, files, password, rng)
+    else:
+        write_zipcrypto_zip(archive, files, password, rng)
+    
+    return {
+        "case": case,
+        "archive": archive,
+        "attack": attack,
+        "wordlist": wordlist,
+        "max_length": args.length,
+        "charset": args.charset,
+        "password": password.decode(),
+        "position": index,
+    }
+
+def _rusage() -> dict:
+    if resource is None:
+        return {}
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "cpu_seconds": own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        "peak_rss_mb": own.ru_maxrss / scale,
+        "peak_child_rss_mb": children.ru_maxrss / scale,
+    }
+
+def run_one(config: dict) -> dict:
+    """Run a single configuration in this process and measure it"""
+    extract_dir = tempfile.mkdtemp(prefix="bench-extract-")
+    before = _rusage()
+    wall_start = time.time()
+    try:
+        # The cracker prints its banner lines, keep stdout for the JSON
+        with contextlib.redirect_stdout(io.StringIO()):
+            cracker = ThreadedZipCracker(config["archive"], extract_path=extract_dir, verbose=False,
+                                         verifier=VerifierBackend(config["verifier"]))
+            backend = Backend(config["backend"])
+            if config["attack"] == "bruteforce":
+                result = cracker.crack_bruteforce(config["max_length"], config["charset"],
+                                                  threads=config["workers"],
+                                                  buffer_size=config["buffer"], backend=backend)
+            else:
+                result = cracker.crack_wordlist(config["wordlist"], threads=config["workers"],
+                                                buffer_size=config["buffer"], backend=backend)
+    finally:
+        shutil.rmtree(extract_dir, ignore_errors=True)
+    wall = time.time() - wall_start
+    after = _rusage()
+    
+    report = {
+        "success": result.success and result.password == config["password"],
+        "error": result.error,
+        "attempts": result.attempts,
+        "time_to_hit": result.time_elapsed if result.success else None,
+        "attempts_per_sec": result.attempts / result.time_elapsed if result.time_elapsed > 0 else 0.0,
+        "wall_seconds": wall,
+    }
+    if after:
+        cpu = after["cpu_seconds"] - before["cpu_seconds"]
+        report.update({
+            "cpu_seconds": cpu,
+            # In cores: 1.0 is one core fully busy for the whole run
+            "cpu_utilization": cpu / wall if wall > 0 else 0.0,
+            "peak_rss_mb": after["peak_rss_mb"],
+            "peak_child_rss_mb": after["peak_child_rss_mb"],
+        })
+    else:
+        report.update({"cpu_seconds": None, "cpu_utilization": None,
+                       "peak_rss_mb": None, "peak_child_rss_mb": None})
+    return report
+
+def run_isolated(config: dict, timeout: float) -> dict:
+    """Run one configuration in a fresh interpreter so RSS and CPU are its own"""
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(config)],
+            capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {"success": False, "error": f"Timed out after {timeout:.0f} s"}
+    
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {"success": False, "error": lines[-1] if lines else "crashed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark ThreadedZipCracker on synthetic encrypted archives",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  bench.py
+  bench.py --cases zipcrypto:bruteforce --backends thread process --workers 1 2 4 8
+  bench.py --cases aes:wordlist --words 5000 --output results/aes.json
+
+Cases are <encryption>:<attack>, encryption zipcrypto|aes, attack bruteforce|wordlist.
+The password sits at --position (0..1) of the brute-force keyspace or wordlist.
+        """
+    )
+    parser.add_argument("--cases", nargs="+",
+                        default=["zipcrypto:bruteforce", "zipcrypto:wordlist", "aes:wordlist"])
+    parser.add_argument("--backends", nargs="+", choices=[b.value for b in Backend],
+                        default=[b.value for b in Backend])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, os.cpu_count() or 4])
+    parser.add_argument("--buffers", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--verifiers", nargs="+", choices=[v.value for v in VerifierBackend],
+                        default=[VerifierBackend.SCALAR.value])
+    parser.add_argument("--length", type=int, default=4, help="Brute-force max length (default: 4)")
+    parser.add_argument("--charset", default="lower", help="Brute-force charset (default: lower)")
+    parser.add_argument("--words", type=int, default=20000, help="Synthetic wordlist size (default: 20000)")
+    parser.add_argument("--position", type=float, default=0.5,
+                        help="Where the password sits, 0..1 (default: 0.5)")
+    parser.add_argument("--payload-kb", type=int, default=64, help="Size of the binary member (default: 64)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per configuration (default: 1)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for archives and wordlists (default: 1)")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds per run (default: 600)")
+    parser.add_argument("--workdir", help="Keep generated archives here instead of a temp dir")
+    parser.add_argument("-o", "--output", help="Write the JSON report to a file instead of stdout")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    
+    args = parser.parse_args()
+    
+    if args.run_one:
+        print(json.dumps(run_one(json.loads(args.run_one))))
+        return
+    
+    rng = random.Random(args.seed)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench-")
+    os.makedirs(workdir, exist_ok=True)
+    
+    try:
+        cases = [build_case(case, workdir, args, rng) for case in args.cases]
+        results = []
+        for case in cases:
+            for backend in args.backends:
+                for workers in args.workers:
+                    for buffer_size in args.buffers:
+                        for verifier in args.verifiers:
+                            config = dict(case, backend=backend, workers=workers,
+                                          buffer=buffer_size, verifier=verifier)
+                            for repeat in range(args.repeat):
+                                print(f"[*] {case['case']} {backend} x{workers} -b {buffer_size} "
+                                      f"{verifier} #{repeat + 1}", file=sys.stderr)
+                                measured = run_isolated(config, args.timeout)
+                                results.append({
+                                    "case": case["case"],
+                                    "backend": backend,
+                                    "workers": workers,
+                                    "buffer": buffer_size,
+                                    "verifier": verifier,
+                                    "repeat": repeat + 1,
+                                    "password_position": case["position"],
+                                    **measured,
+                                })
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "length": args.length,
+            "charset": args.charset,
+            "words": args.words,
+            "position": args.position,
+        },
+        "results": results,
+    }
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"[*] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
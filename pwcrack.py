@@ -9,7 +9,11 @@ import os
 import sys
 import argparse
 import platform
-from utils import ThreadedZipCracker, Wordlist
+from utils import (ThreadedZipCracker, Wordlist, Backend, VerifierBackend, CHARSETS, MaskKeyspace,
+                   BruteForceKeyspace, AttackMode, CLUSTER_PORT, parse_address, MarkovModel,
+                   MarkovKeyspace, compile_wordlist, MetricsWriter)
+
+DEFAULT_POTFILE = os.path.join(os.path.expanduser("~"), ".pwcrack.potfile")
 
 def print_banner():
     """Print a properly formatted banner with dynamic width"""
@@ -54,21 +58,259 @@ def print_banner():
     banner = "\n".join([top_border] + formatted_lines + [bottom_border])
     print("\n" + banner + "\n")
 
+def add_common_arguments(parser):
+    """Options shared by every attack mode, given before the archive"""
+    parser.add_argument("-e", "--extractpath", 
+                       help="Extraction path (default: current directory)",
+                       default=".",
+                       type=str)
+    parser.add_argument("-t", "--threads", 
+                       help="Number of threads (default: CPU cores)",
+                       type=int,
+                       default=os.cpu_count() or 4)
+    parser.add_argument("--backend",
+                       help="Run workers as threads or processes (default: thread)",
+                       choices=[b.value for b in Backend],
+                       default=Backend.THREAD.value)
+    parser.add_argument("--verifier",
+                       help="Check candidates one by one or in NumPy batches (default: scalar)",
+                       choices=[v.value for v in VerifierBackend],
+                       default=VerifierBackend.SCALAR.value)
+    parser.add_argument("-b", "--buffer", 
+                       help="Candidates per work unit handed to a worker (default: 1000)",
+                       type=int,
+                       default=1000)
+    parser.add_argument("-T", "--target",
+                       help="Another zip file to crack in the same run (repeatable, batch mode)",
+                       action="append",
+                       default=[])
+    parser.add_argument("--auto",
+                       help="Calibrate backend, worker count and batch size against the archive first",
+                       action="store_true")
+    parser.add_argument("--session",
+                       help="Session file for checkpoints (default: <file>.session)",
+                       type=str)
+    parser.add_argument("--restore",
+                       help="Continue from the last checkpoint in the session file",
+                       action="store_true")
+    parser.add_argument("--potfile",
+                       help=f"Cracked passwords by archive, checked before attacking (default: {DEFAULT_POTFILE})",
+                       default=DEFAULT_POTFILE)
+    parser.add_argument("--no-potfile",
+                       help="Neither read nor write the potfile",
+                       action="store_true")
+    parser.add_argument("--metrics",
+                       help="Write stage timings, worker rates, queue depth and ETA to this file",
+                       type=str)
+    parser.add_argument("--metrics-format",
+                       help="JSON lines appended per interval, or a Prometheus textfile (default: jsonl)",
+                       choices=list(MetricsWriter.FORMATS),
+                       default="jsonl")
+    parser.add_argument("--metrics-interval",
+                       help="Seconds between metrics writes (default: 10)",
+                       type=float,
+                       default=10.0)
+    parser.add_argument("-q", "--quiet", 
+                       help="Quiet mode (minimal output)",
+                       action="store_true")
+
+def add_mask_arguments(parser):
+    """Custom charsets and increment options shared by mask and hybrid"""
+    for number in range(1, 5):
+        parser.add_argument(f"-{number}", f"--custom-charset{number}", dest=f"charset{number}",
+                            help=f"Custom charset for ?{number}")
+    parser.add_argument("-i", "--increment",
+                        help="Also try shorter prefixes of the mask",
+                        action="store_true")
+    parser.add_argument("--increment-min", type=int, help="Shortest prefix length (default: 1)")
+    parser.add_argument("--increment-max", type=int, help="Longest prefix length (default: mask length)")
+
+def add_keyspace_parsers(subparsers):
+    """bruteforce, mask and markov subcommands, for local attacks and for serve"""
+    brute_parser = subparsers.add_parser("bruteforce", help="Use brute force attack")
+    brute_parser.add_argument("characters", type=int, help="Maximum password length")
+    brute_parser.add_argument("-C", "--charset", 
+                            help="Character set for brute force",
+                            default="MiniASCII",
+                            choices=list(CHARSETS))
+    
+    mask_parser = subparsers.add_parser("mask", help="Use mask attack (hashcat-style placeholders)")
+    mask_parser.add_argument("mask", help="Mask, e.g. '?u?l?l?l?d?d'")
+    add_mask_arguments(mask_parser)
+    
+    markov_parser = subparsers.add_parser("markov", help="Use brute force ordered by a trained Markov model")
+    markov_parser.add_argument("model", help="Model file from 'markov train'")
+    markov_parser.add_argument("characters", type=int, help="Maximum password length")
+    markov_parser.add_argument("--min-length",
+                               help="Minimum password length (default: 1)",
+                               type=int,
+                               default=1)
+    markov_parser.add_argument("--threshold",
+                               help="Only the N most likely next characters at every position",
+                               type=int)
+    markov_parser.add_argument("--max-level",
+                               help="Skip candidates less likely than about 2^-N",
+                               type=int)
+
+def build_markov_keyspace(args) -> MarkovKeyspace:
+    """MarkovKeyspace from the markov arguments, exits on a bad model"""
+    try:
+        return MarkovKeyspace(MarkovModel.load(args.model), args.min_length, args.characters,
+                              args.threshold, args.max_level)
+    except (OSError, ValueError) as e:
+        print(f"[-] Cannot use Markov model: {e}")
+        sys.exit(1)
+
+def run_tool(argv) -> int:
+    """Commands that work on files other than an archive: markov train, wordlist compile"""
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     description="Prepare files for attacks")
+    tools = parser.add_subparsers(dest="tool", required=True)
+    
+    markov_parser = tools.add_parser("markov", help="Markov model tools")
+    markov_tools = markov_parser.add_subparsers(dest="action", required=True)
+    train_parser = markov_tools.add_parser("train", help="Train a Markov model from a wordlist")
+    train_parser.add_argument("wordlist", help="Wordlist of likely passwords")
+    train_parser.add_argument("model", help="Model file to write")
+    train_parser.add_argument("--positions",
+                              help="Positions with their own statistics, later ones share the last (default: 16)",
+                              type=int,
+                              default=16)
+    
+    wordlist_parser = tools.add_parser("wordlist", help="Wordlist tools")
+    wordlist_tools = wordlist_parser.add_subparsers(dest="action", required=True)
+    compile_parser = wordlist_tools.add_parser("compile", help="Compile a text wordlist into the indexed format")
+    compile_parser.add_argument("wordlist", help="Text wordlist, one password per line")
+    compile_parser.add_argument("output", help="Compiled wordlist to write")
+    
+    args = parser.parse_args(argv)
+    
+    if args.tool == "markov" and args.action == "train":
+        if not os.path.exists(args.wordlist):
+            print(f"[-] Wordlist not found: {args.wordlist}")
+            return 1
+        model = MarkovModel.train(args.wordlist, max(1, args.positions))
+        model.save(args.model)
+        words = sum(model.counts[0][len(model.alphabet)])
+        print(f"[✓] Trained on {words:,} words, model written to {args.model} "
+              f"({os.path.getsize(args.model):,} bytes)")
+    
+    elif args.tool == "wordlist" and args.action == "compile":
+        if not os.path.exists(args.wordlist):
+            print(f"[-] Wordlist not found: {args.wordlist}")
+            return 1
+        words, duplicates = compile_wordlist(args.wordlist, args.output)
+        print(f"[✓] Compiled {words:,} words ({duplicates:,} duplicates dropped) to {args.output} "
+              f"({os.path.getsize(args.output):,} bytes)")
+    return 0
+
+# First arguments that select a tool instead of an archive
+TOOL_COMMANDS = {("markov", "train"), ("wordlist", "compile")}
+
+def build_mask_keyspace(args) -> MaskKeyspace:
+    """MaskKeyspace from the mask arguments, exits on a bad mask"""
+    try:
+        return MaskKeyspace(args.mask, [args.charset1, args.charset2, args.charset3, args.charset4],
+                            args.increment, args.increment_min, args.increment_max)
+    except ValueError as e:
+        print(f"[-] Invalid mask: {e}")
+        sys.exit(1)
+
 def main():
     print_banner()
     
+    # Tool commands may follow common options such as --no-potfile, which
+    # the tools ignore, so look for them among the remaining arguments
+    options = argparse.ArgumentParser(add_help=False)
+    add_common_arguments(options)
+    _, remaining = options.parse_known_args()
+    if tuple(remaining[:2]) in TOOL_COMMANDS:
+        sys.exit(run_tool(remaining))
+    
     parser = argparse.ArgumentParser(
         description="Multi-threaded zip password cracker",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
   zip_cracker.py archive.zip wordlist passwords.txt -t 8
+  zip_cracker.py archive.zip wordlist passwords.txt --rules best64.rule
+  zip_cracker.py archive.zip wordlist more-passwords.txt --dedup 256
+  zip_cracker.py wordlist compile passwords.txt passwords.pwl
+  zip_cracker.py archive.zip wordlist passwords.pwl --min-length 8 --max-length 12
+  zip_cracker.py ./inbox/ wordlist passwords.txt
+  zip_cracker.py -T second.zip -T third.zip first.zip mask '?l?l?l?l?d?d'
   zip_cracker.py archive.zip bruteforce 4 -t 4 --charset alphanum
   zip_cracker.py archive.zip bruteforce 3 --charset lower -t 12 -e ./extracted
+  zip_cracker.py -t 32 --backend process archive.zip bruteforce 6
+  zip_cracker.py --auto archive.zip mask '?a?a?a?a?a'
+  zip_cracker.py --restore archive.zip bruteforce 7 --charset alphanum
+  zip_cracker.py archive.zip mask '?u?l?l?l?d?d'
+  zip_cracker.py archive.zip mask '?1?l?l?l20?d?d' -1 '?u?d'
+  zip_cracker.py archive.zip mask '?a?a?a?a?a?a' -i --increment-min 4
+  zip_cracker.py archive.zip hybrid words.txt '?d?d?d?d?s'
+  zip_cracker.py archive.zip hybrid words.txt '?d?d' --prepend
+  zip_cracker.py markov train leaked-passwords.txt human.markov
+  zip_cracker.py archive.zip markov human.markov 8 --threshold 20
+  zip_cracker.py archive.zip serve --listen 0.0.0.0:7878 bruteforce 8 --charset alphanum
+  zip_cracker.py -t 8 archive.zip worker coordinator-host:7878
+
+Encryption:
+  Traditional ZipCrypto and WinZip AES (AE-1/AE-2, 128/192/256-bit).
+  AES costs a PBKDF2 per attempt; hashlib runs it without holding the GIL,
+  so the thread backend already scales with cores.
+
+Batch mode:
+  Pass a directory, or add archives with -T, to crack many at once: every
+  candidate is generated once and tried on each archive not cracked yet.
+  Cracked archives drop out and are extracted to <extractpath>/<name>/.
+
+Compiled wordlists:
+  wordlist compile drops blank lines and duplicates and stores the words
+  grouped by length with an index, once. Every attack that takes a wordlist
+  (wordlist, hybrid, markov train) accepts the compiled file: runs map it
+  without parsing, know the exact word count (progress and ETA), split it
+  into even ranges, and --min-length/--max-length skip whole lengths.
+  Words are tried shortest length first, in wordlist order within a length.
+
+Potfile and dedup:
+  Found passwords are appended to the potfile (--potfile, default
+  ~/.pwcrack.potfile) by archive fingerprint, and every attack checks it
+  first. wordlist --dedup MB keeps a Bloom filter of the candidates already
+  tried on the archive (<file>.bloom), so overlapping wordlists, repeated
+  lines and rule duplicates are only tried once across runs. A too small
+  filter skips untried candidates, the startup line shows the expected rate.
+
+Distributed:
+  serve holds the keyspace and leases index ranges to workers over TCP.
+  Every worker needs its own copy of the archive (checked by fingerprint);
+  -t sets its process count. Leases without a heartbeat for --lease-timeout
+  seconds are handed out again, and a found password stops every worker.
+  serve checkpoints to the session file like a local run (--restore).
+  There is no authentication: only use it on a trusted network.
+
+Sessions:
+  Progress is checkpointed to <file>.session (or --session PATH).
+  After a crash or Ctrl-C, run the same command with --restore to continue.
 
 Threading:
-  Use -t/--threads to specify number of threads (default: CPU count)
+  Use -t/--threads to specify number of workers (default: CPU count)
   More threads = faster cracking, but uses more CPU
+  Use --backend process to run workers as processes and use every core
+  (threads share one core because of the GIL)
+  Use -b/--buffer to set how many candidates a worker takes per batch;
+  bigger batches mean less queue and bookkeeping overhead per attempt
+  Use --verifier numpy to pre-filter ZipCrypto batches with NumPy
+  (pair it with a large buffer, e.g. -b 100000)
+  Use --auto to let a few seconds of trials on the archive pick the backend,
+  worker count and batch size instead (overrides -t, -b and --backend)
+
+Metrics:
+  --metrics FILE records where the time goes: seconds per stage (candidate
+  generation, queue wait, pre-filter, full verify) and attempts per worker,
+  plus queue depth, progress and ETA, every --metrics-interval seconds and
+  once at the end. --metrics-format prometheus rewrites FILE for the
+  node_exporter textfile collector instead of appending JSON lines.
+  Without --metrics the workers do no timing at all.
 
 Character sets:
   MiniASCII  - Lowercase + digits (a-z0-9) [DEFAULT]
@@ -77,73 +319,164 @@ Character sets:
   letters    - All letters (a-zA-Z)
   alphanum   - Letters + digits (a-zA-Z0-9)
   all        - All printable ASCII
+
+Rules:
+  wordlist --rules FILE applies hashcat-style rules (one per line) to every
+  word inside the workers, e.g.  :  c  u  r  $1  c$2$0$2$4  sa@ so0  T0 ^!
+  Functions: : l u c C t TN r d pN f { } $X ^X [ ] DN xNM ONM iNX oNX 'N
+  sXY @X zN ZN q k K *NM E yN YN +N -N LN RN .N ,N and rejects <N >N _N !X /X (X )X
+
+Markov:
+  markov train counts, for every position and previous character, which
+  characters follow in a wordlist and stores that in a small model file.
+  markov LENGTH then tries every candidate up to LENGTH in roughly descending
+  probability under the model, so likely human passwords come early instead
+  of after half the keyspace. --threshold N keeps only the N most likely
+  next characters, --max-level N stops at candidates about 2^-N likely.
+  Works with serve, sessions and every backend like bruteforce.
+
+Mask placeholders:
+  ?l  a-z          ?u  A-Z          ?d  0-9
+  ?s  space and punctuation        ?a  ?l?u?d?s
+  ?h  0-9a-f       ?H  0-9A-F       ?b  every byte 0x00-0xff
+  ?1..?4  custom charsets from -1..-4 (may use the placeholders above)
+  ??  a literal '?', any other character is a literal
+  -i/--increment tries every mask prefix from --increment-min to --increment-max
+  hybrid combines every wordlist word with the mask (appended, or --prepend)
         """
     )
     
-    parser.add_argument("file", help="Zip file to crack")
+    parser.add_argument("file", help="Zip file to crack, or a directory of zip files (batch mode)")
     
     subparsers = parser.add_subparsers(dest="mode", required=True, help="Attack mode")
     
     # Wordlist mode
     wordlist_parser = subparsers.add_parser("wordlist", help="Use wordlist attack")
     wordlist_parser.add_argument("wordlist", help="Path to wordlist file")
+    wordlist_parser.add_argument("-r", "--rules",
+                               help="Hashcat-style rule file applied to every word",
+                               type=str)
+    wordlist_parser.add_argument("--dedup",
+                               help="Skip candidates already tried on this archive, Bloom filter of MB megabytes",
+                               type=int,
+                               metavar="MB")
+    wordlist_parser.add_argument("--dedup-file",
+                               help="Bloom filter file (default: <file>.bloom)",
+                               type=str)
+    wordlist_parser.add_argument("--min-length",
+                               help="Skip shorter words (compiled wordlists only)",
+                               type=int)
+    wordlist_parser.add_argument("--max-length",
+                               help="Skip longer words (compiled wordlists only)",
+                               type=int)
     
-    # Brute force mode  
-    brute_parser = subparsers.add_parser("bruteforce", help="Use brute force attack")
-    brute_parser.add_argument("characters", type=int, help="Maximum password length")
-    brute_parser.add_argument("-C", "--charset", 
-                            help="Character set for brute force",
-                            default="MiniASCII",
-                            choices=["MiniASCII", "lower", "upper", "letters", "alphanum", "all"])
+    # Brute force and mask modes, also available behind serve
+    add_keyspace_parsers(subparsers)
     
-    # Common arguments
-    parser.add_argument("-e", "--extractpath", 
-                       help="Extraction path (default: current directory)",
-                       default=".",
-                       type=str)
-    parser.add_argument("-t", "--threads", 
-                       help="Number of threads (default: CPU cores)",
-                       type=int,
-                       default=os.cpu_count() or 4)
-    parser.add_argument("-b", "--buffer", 
-                       help="Buffer size for password queue (default: 1000)",
-                       type=int,
-                       default=1000)
-    parser.add_argument("-q", "--quiet", 
-                       help="Quiet mode (minimal output)",
-                       action="store_true")
+    # Hybrid mode
+    hybrid_parser = subparsers.add_parser("hybrid", help="Use wordlist words plus a mask")
+    hybrid_parser.add_argument("wordlist", help="Path to wordlist file")
+    hybrid_parser.add_argument("mask", help="Mask appended to every word, e.g. '?d?d?d?d'")
+    hybrid_parser.add_argument("-p", "--prepend",
+                               help="Put the mask before the word instead of after it",
+                               action="store_true")
+    add_mask_arguments(hybrid_parser)
+    
+    # Distributed mode
+    serve_parser = subparsers.add_parser("serve", help="Coordinate a brute force, mask or Markov attack over TCP")
+    serve_parser.add_argument("-l", "--listen",
+                              help=f"Address to listen on (default: 0.0.0.0:{CLUSTER_PORT})",
+                              default=f"0.0.0.0:{CLUSTER_PORT}")
+    serve_parser.add_argument("--lease-size",
+                              help="Candidates per lease handed to a worker (default: 1000000)",
+                              type=int,
+                              default=1000000)
+    serve_parser.add_argument("--lease-timeout",
+                              help="Seconds without a heartbeat before a lease is handed out again (default: 60)",
+                              type=float,
+                              default=60.0)
+    add_keyspace_parsers(serve_parser.add_subparsers(dest="attack", required=True, help="Attack mode"))
+    
+    worker_parser = subparsers.add_parser("worker", help="Work for a coordinator started with serve")
+    worker_parser.add_argument("address", help=f"Coordinator host[:port] (default port: {CLUSTER_PORT})")
+    
+    add_common_arguments(parser)
     
     args = parser.parse_args()
     
+    # Like hashcat, the increment bounds mean nothing without -i
+    if not getattr(args, "increment", True) and (args.increment_min is not None
+                                                 or args.increment_max is not None):
+        parser.error("--increment-min and --increment-max require -i/--increment")
+    
     # Validate file exists
     if not os.path.exists(args.file):
         print(f"[-] File not found: {args.file}")
         sys.exit(1)
     
+    # A directory means every zip in it
+    if os.path.isdir(args.file):
+        targets = sorted(os.path.join(args.file, name) for name in os.listdir(args.file)
+                         if name.lower().endswith(".zip"))
+    else:
+        targets = [args.file]
+    for target in args.target:
+        if not os.path.exists(target):
+            print(f"[-] File not found: {target}")
+            sys.exit(1)
+        targets.append(target)
+    if not targets:
+        print(f"[-] No zip files in {args.file}")
+        sys.exit(1)
+    
     # Create extract directory if needed
     if args.extractpath != "." and not os.path.exists(args.extractpath):
         os.makedirs(args.extractpath, exist_ok=True)
     
     # Create cracker instance
     cracker = ThreadedZipCracker(
-        zip_path=args.file,
+        zip_path=targets if len(targets) > 1 else targets[0],
         extract_path=args.extractpath,
-        verbose=not args.quiet
+        verbose=not args.quiet,
+        session_path=args.session or args.file.rstrip("/\\") + ".session",
+        verifier=VerifierBackend(args.verifier),
+        potfile_path=None if args.no_potfile else args.potfile,
+        metrics_path=args.metrics,
+        metrics_format=args.metrics_format,
+        metrics_interval=args.metrics_interval,
+        autotune=args.auto
     )
     
-    print(f"[*] Using {args.threads} threads")
-    print(f"[*] Target: {os.path.basename(args.file)}")
+    backend = Backend(args.backend)
+    if args.auto:
+        print("[*] Backend, workers and batch size: calibrated at startup")
+    else:
+        print(f"[*] Using {args.threads} {backend.value} workers")
+    if len(targets) > 1:
+        print(f"[*] Targets: {len(targets)} archives, every candidate is tried on each")
+    else:
+        print(f"[*] Target: {os.path.basename(args.file)}")
     
     # Start cracking based on mode
     if args.mode == "wordlist":
         if not os.path.exists(args.wordlist):
             print(f"[-] Wordlist not found: {args.wordlist}")
             sys.exit(1)
+        if args.rules and not os.path.exists(args.rules):
+            print(f"[-] Rule file not found: {args.rules}")
+            sys.exit(1)
         
         result = cracker.crack_wordlist(
             wordlist_path=args.wordlist,
             threads=args.threads,
-            buffer_size=args.buffer
+            buffer_size=args.buffer,
+            backend=backend,
+            restore=args.restore,
+            rules_path=args.rules,
+            dedup_memory=args.dedup << 20 if args.dedup else None,
+            dedup_path=args.dedup_file,
+            min_length=args.min_length,
+            max_length=args.max_length
         )
         
     elif args.mode == "bruteforce":
@@ -159,7 +492,7 @@ Character sets:
         if estimated > 1000000 and not args.quiet:
             print("[!] WARNING: Over 1 million combinations!")
             
-            if estimated > 10000000:
+            if estimated > 10000000 and not args.restore:
                 response = input("[?] Continue? (y/N): ").strip().lower()
                 if response != 'y':
                     print("[-] Cancelled")
@@ -169,9 +502,109 @@ Character sets:
             max_length=args.characters,
             charset=args.charset,
             threads=args.threads,
-            buffer_size=args.buffer
+            buffer_size=args.buffer,
+            backend=backend,
+            restore=args.restore
+        )
+    
+    elif args.mode == "mask":
+        custom_charsets = [args.charset1, args.charset2, args.charset3, args.charset4]
+        keyspace = build_mask_keyspace(args)
+        
+        if not args.quiet:
+            print(f"[*] Mask: {args.mask}")
+            print(f"[*] Lengths: {keyspace.min_length}-{keyspace.max_length}")
+            print(f"[*] Exact: {keyspace.size:,} combinations")
+        
+        if keyspace.size > 10000000 and not args.quiet and not args.restore:
+            response = input("[?] Continue? (y/N): ").strip().lower()
+            if response != 'y':
+                print("[-] Cancelled")
+                sys.exit(0)
+        
+        result = cracker.crack_mask(
+            mask=args.mask,
+            custom_charsets=custom_charsets,
+            increment=args.increment,
+            increment_min=args.increment_min,
+            increment_max=args.increment_max,
+            threads=args.threads,
+            buffer_size=args.buffer,
+            backend=backend,
+            restore=args.restore
+        )
+    
+    elif args.mode == "markov":
+        keyspace = build_markov_keyspace(args)
+        
+        if not args.quiet:
+            print(f"[*] Lengths: {args.min_length}-{args.characters}")
+            print(f"[*] Exact: {keyspace.size:,} combinations, most likely first")
+        
+        result = cracker.crack_markov(
+            model_path=args.model,
+            max_length=args.characters,
+            min_length=args.min_length,
+            threshold=args.threshold,
+            max_level=args.max_level,
+            threads=args.threads,
+            buffer_size=args.buffer,
+            backend=backend,
+            restore=args.restore
+        )
+    
+    elif args.mode == "hybrid":
+        if not os.path.exists(args.wordlist):
+            print(f"[-] Wordlist not found: {args.wordlist}")
+            sys.exit(1)
+        
+        result = cracker.crack_hybrid(
+            wordlist_path=args.wordlist,
+            mask=args.mask,
+            custom_charsets=[args.charset1, args.charset2, args.charset3, args.charset4],
+            prepend=args.prepend,
+            increment=args.increment,
+            increment_min=args.increment_min,
+            increment_max=args.increment_max,
+            threads=args.threads,
+            buffer_size=args.buffer,
+            backend=backend,
+            restore=args.restore
         )
     
+    elif args.mode == "serve":
+        if args.attack == "bruteforce":
+            mode, keyspace = AttackMode.BRUTEFORCE, BruteForceKeyspace(args.characters, args.charset)
+        elif args.attack == "markov":
+            mode, keyspace = AttackMode.MARKOV, build_markov_keyspace(args)
+        else:
+            mode, keyspace = AttackMode.MASK, build_mask_keyspace(args)
+        
+        result = cracker.serve(
+            mode,
+            keyspace,
+            listen=parse_address(args.listen, default_host="0.0.0.0"),
+            lease_size=args.lease_size,
+            lease_timeout=args.lease_timeout,
+            chunk_size=args.buffer,
+            restore=args.restore
+        )
+    
+    elif args.mode == "worker":
+        result = cracker.join_cluster(parse_address(args.address), processes=args.threads)
+        
+        # The coordinator extracts, a worker only reports
+        print("\n" + "="*60)
+        if result.success:
+            print(f"[✓] This worker found the password: {result.password}")
+        elif result.error:
+            print(f"[✗] {result.error}")
+        else:
+            print("[*] Stopped by the coordinator")
+        print(f"[*] Attempts: {result.attempts:,} in {result.time_elapsed:.2f} seconds")
+        print("="*60)
+        sys.exit(0 if result.success or not result.error else 1)
+    
     else:
         print(f"[-] Unknown mode: {args.mode}")
         sys.exit(1)
@@ -179,10 +612,27 @@ Character sets:
     # Print results
     print("\n" + "="*60)
     
-    if result.success:
+    if len(targets) > 1:
+        # One line per archive, extracted into a folder each
+        for target, archive_result in cracker.results.items():
+            if archive_result.success:
+                print(f"[✓] {os.path.basename(target)}: {archive_result.password}"
+                      f" -> {os.path.abspath(cracker.extract_path_for(target))}")
+            else:
+                print(f"[✗] {os.path.basename(target)}: {archive_result.error}")
+        print(f"[*] Attempts: {result.attempts:,} in {result.time_elapsed:.2f} seconds")
+        if result.error:
+            print(f"[!] {result.error}")
+    
+    elif result.success:
         print(f"[✓] SUCCESS!")
         print(f"[✓] Password: {result.password}")
-        print(f"[✓] Found by thread: {result.thread_id}")
+        if result.source == "potfile":
+            print(f"[✓] Found in the potfile")
+        elif result.source is not None:
+            print(f"[✓] Found by worker: {result.source}")
+        else:
+            print(f"[✓] Found by {backend.value}: {result.thread_id}")
         print(f"[✓] Time: {result.time_elapsed:.2f} seconds")
         print(f"[✓] Attempts: {result.attempts:,}")
         if result.time_elapsed > 0:
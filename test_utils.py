@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for utils.py, run with: python -m unittest (or pytest)
+Archives are built on the fly with the bench.py writers.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from bench import write_zipcrypto_zip
+from utils import (ThreadedZipCracker, ZipVerifier, MaskKeyspace, MarkovModel, MarkovKeyspace,
+                   MappedWordlist, RuleSet, RuledWordlist, parse_rule)
+
+class ZipVerifierTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="pwcrack-test-")
+    
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+    
+    def test_empty_member_is_not_the_verify_member(self):
+        # Info-ZIP style: an empty log next to the real data, same password.
+        # Checked on the empty member alone, every password that passes the
+        # check byte would "verify"
+        path = os.path.join(self.workdir, "empty.zip")
+        write_zipcrypto_zip(path, {"empty.log": b"", "data.txt": b"real contents " * 20},
+                            b"zz9", random.Random(1))
+        
+        verifier = ZipVerifier(path)
+        try:
+            self.assertEqual(verifier.member.filename, "data.txt")
+            self.assertTrue(verifier.check(b"zz9"))
+            self.assertFalse(any(verifier.check(password) for password in (b"ay0", b"d4w", b"zz8")))
+        finally:
+            verifier.close()
+        
+        cracker = ThreadedZipCracker(path, extract_path=os.path.join(self.workdir, "out"), verbose=False)
+        result = cracker.crack_mask("?l?l?d", threads=2)
+        self.assertTrue(result.success)
+        self.assertEqual(result.password, "zz9")
+        self.assertIsNone(result.error)
+
+class KeyspaceTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="pwcrack-test-")
+    
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+    
+    def assertCovers(self, ranges, start, end):
+        """Ranges are non-empty, in order and cover [start, end) exactly once"""
+        position = start
+        for lo, hi in ranges:
+            self.assertEqual(lo, position)
+            self.assertLess(lo, hi)
+            position = hi
+        self.assertEqual(position, end)
+    
+    def assertIndexable(self, keyspace):
+        candidates = list(keyspace.iter_range(0, keyspace.size))
+        self.assertEqual(len(candidates), keyspace.size)
+        self.assertEqual(len(set(candidates)), keyspace.size)
+        for i, candidate in enumerate(candidates):
+            self.assertEqual(keyspace.candidate(i), candidate)
+            self.assertEqual(keyspace.index(keyspace.candidate(i)), i)
+        
+        for chunk_size, start in ((1, 0), (7, 0), (7, 5), (keyspace.size + 3, 0), (4, keyspace.size - 1)):
+            self.assertCovers(keyspace.ranges(chunk_size, start), start, keyspace.size)
+        self.assertEqual([candidate for lo, hi in keyspace.ranges(7) for candidate in keyspace.iter_range(lo, hi)],
+                         candidates)
+        with self.assertRaises(IndexError):
+            keyspace.candidate(keyspace.size)
+    
+    def test_mask_keyspace(self):
+        self.assertIndexable(MaskKeyspace("a?d?1", ["xyz"]))
+        self.assertIndexable(MaskKeyspace("?l?d?h", increment=True, min_length=2))
+        with self.assertRaises(ValueError):
+            MaskKeyspace("?d?d").index(b"1a")
+    
+    def test_markov_keyspace(self):
+        rng = random.Random(3)
+        path = os.path.join(self.workdir, "words.txt")
+        with open(path, "w") as f:
+            for _ in range(300):
+                f.write("".join(rng.choice("abcde1") for _ in range(rng.randint(1, 5))) + "\n")
+        model = MarkovModel.train(path, positions=3)
+        
+        self.assertIndexable(MarkovKeyspace(model, 1, 3, threshold=4))
+        self.assertIndexable(MarkovKeyspace(model, 2, 4, threshold=3, max_level=8))
+        with self.assertRaises(ValueError):
+            # Cut by the threshold
+            MarkovKeyspace(model, 1, 3, threshold=4).index(b"zz")
+    
+    def test_ruled_wordlist(self):
+        path = os.path.join(self.workdir, "words.txt")
+        with open(path, "wb") as f:
+            f.write(b"alpha\nbeta\n\ngamma\r\ndelta")
+        rules = RuleSet([parse_rule(rule) for rule in (b":", b"u", b"$1")])
+        expected = [b"alpha", b"ALPHA", b"alpha1", b"beta", b"BETA", b"beta1",
+                    b"gamma", b"GAMMA", b"gamma1", b"delta", b"DELTA", b"delta1"]
+        
+        ruled = RuledWordlist(MappedWordlist(path), rules)
+        try:
+            for candidates_per_range in (1, 4, 100):
+                for start, skipped in ((0, 0), (3, 3), (6, 3), (ruled.size - 2, 12)):
+                    ranges = list(ruled.ranges(candidates_per_range, start))
+                    self.assertCovers(ranges, ruled.wordlist.align(start), ruled.size)
+                    self.assertEqual([candidate for lo, hi in ranges for candidate in ruled.iter_range(lo, hi)],
+                                     expected[skipped:])
+        finally:
+            ruled.close()
+
+if __name__ == '__main__':
+    unittest.main()
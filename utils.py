@@ -1,15 +1,58 @@
+import asyncio
+import bisect
+import concurrent.futures
+import hashlib
+import heapq
+import hmac
 import itertools
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import pickle
 import string
+import struct
+import tempfile
 import threading
 import queue
+import shutil
+import signal
+import socket
+import socketserver
 import time
-from typing import Generator, List, Optional, Callable
-from dataclasses import dataclass
+import zipfile
+import zlib
+from typing import AsyncIterator, Generator, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher as _CryptographyCipher
+    from cryptography.hazmat.primitives.ciphers import algorithms as _cryptography_algorithms
+    from cryptography.hazmat.primitives.ciphers import modes as _cryptography_modes
+except ImportError:
+    _CryptographyCipher = None
+
 class AttackMode(Enum):
     WORDLIST = "wordlist"
     BRUTEFORCE = "bruteforce"
+    MASK = "mask"
+    HYBRID = "hybrid"
+    MARKOV = "markov"
+
+class Backend(Enum):
+    THREAD = "thread"
+    PROCESS = "process"
+
+class VerifierBackend(Enum):
+    SCALAR = "scalar"
+    NUMPY = "numpy"
 
 @dataclass
 class CrackResult:
@@ -19,6 +62,1132 @@ class CrackResult:
     time_elapsed: float = 0.0
     thread_id: int = 0
     error: Optional[str] = None
+    password_bytes: Optional[bytes] = None
+    archive: Optional[str] = None
+    # Set when no local worker found it: "potfile", or the cluster worker's name
+    source: Optional[str] = None
+
+@dataclass
+class Calibration:
+    """
+    Settings picked by ThreadedZipCracker.calibrate(), with the measured rate
+    and every trial. settings go straight into the crack_* methods.
+    """
+    backend: Backend
+    workers: int
+    buffer_size: int
+    rate: float
+    trials: List[dict] = field(default_factory=list)
+    
+    @property
+    def settings(self) -> dict:
+        return {"threads": self.workers, "buffer_size": self.buffer_size, "backend": self.backend}
+
+def decode_password(password: bytes) -> str:
+    """Printable form of a raw candidate: UTF-8, or latin-1 for anything else"""
+    try:
+        return password.decode('utf-8')
+    except UnicodeDecodeError:
+        return password.decode('latin-1')
+
+# Define character sets (same for all platforms)
+CHARSETS = {
+    "MiniASCII": string.ascii_lowercase + string.digits,
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "letters": string.ascii_letters,
+    "alphanum": string.ascii_letters + string.digits,
+    "all": string.ascii_letters + string.digits + string.punctuation,
+}
+
+def _expand_group(prefix: bytes, positions: List[List[bytes]]) -> Generator[bytes, None, None]:
+    """prefix + one symbol from each position, in itertools.product order"""
+    if len(positions) == 1:
+        for symbol in positions[0]:
+            yield prefix + symbol
+        return
+    for tail in itertools.product(*positions):
+        yield prefix + b''.join(tail)
+
+class PositionalKeyspace:
+    """
+    Candidates built from a list of per-position symbol sets, addressable by index.
+    Lengths min_length..max_length use the first N positions. Index order matches
+    itertools.product: shorter lengths first, then mixed radix with the last
+    position fastest. Candidates are bytes, ready for the verifier.
+    """
+    
+    def __init__(self, positions: List[List[bytes]], min_length: int, max_length: int):
+        if min_length < 1 or max_length < min_length or max_length > len(positions):
+            raise ValueError(f"Invalid length range: {min_length}..{max_length}")
+        if not all(positions[:max_length]):
+            raise ValueError("Charset is empty")
+        
+        self.min_length = min_length
+        self.max_length = max_length
+        self._positions = positions[:max_length]
+        
+        # First index and size of each length
+        self._offsets = {}
+        self._sizes = {}
+        total = 0
+        for length in range(min_length, max_length + 1):
+            size = 1
+            for symbols in self._positions[:length]:
+                size *= len(symbols)
+            self._offsets[length] = total
+            self._sizes[length] = size
+            total += size
+        self.size = total
+    
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Split a global index into (length, index within that length)"""
+        if not 0 <= index < self.size:
+            raise IndexError(f"Keyspace index out of range: {index}")
+        for length in range(self.max_length, self.min_length - 1, -1):
+            if index >= self._offsets[length]:
+                return length, index - self._offsets[length]
+    
+    def _decode(self, local: int, length: int) -> bytes:
+        out = []
+        for symbols in reversed(self._positions[:length]):
+            local, digit = divmod(local, len(symbols))
+            out.append(symbols[digit])
+        return b''.join(reversed(out))
+    
+    def candidate(self, index: int) -> bytes:
+        """Candidate at a global index"""
+        length, local = self._locate(index)
+        return self._decode(local, length)
+    
+    def index(self, candidate: Union[str, bytes]) -> int:
+        """Global index of a candidate"""
+        if isinstance(candidate, str):
+            candidate = candidate.encode('utf-8')
+        
+        for length in range(self.min_length, self.max_length + 1):
+            local = self._match(candidate, length)
+            if local is not None:
+                return self._offsets[length] + local
+        raise ValueError(f"Candidate {candidate!r} is not in the keyspace")
+    
+    def _match(self, candidate: bytes, length: int) -> Optional[int]:
+        """Index within length if candidate splits into one symbol per position"""
+        local = 0
+        pos = 0
+        for symbols in self._positions[:length]:
+            for digit, symbol in enumerate(symbols):
+                if candidate.startswith(symbol, pos):
+                    break
+            else:
+                return None
+            local = local * len(symbols) + digit
+            pos += len(symbol)
+        return local if pos == len(candidate) else None
+    
+    def iter_groups(self, start: int, end: int) -> Generator[Tuple[bytes, List[List[bytes]]], None, None]:
+        """
+        Cover [start, end) with (prefix, positions) blocks: every prefix + one symbol
+        per remaining position, in index order. Lets the verifier share prefix state.
+        """
+        start = max(start, 0)
+        end = min(end, self.size)
+        
+        index = start
+        while index < end:
+            length, local = self._locate(index)
+            positions = self._positions[:length]
+            stop = min(end, self._offsets[length] + self._sizes[length]) - self._offsets[length]
+            
+            while local < stop:
+                # Largest aligned block of trailing positions that fits
+                width, block = 0, 1
+                while width < length:
+                    radix = len(positions[length - 1 - width])
+                    if local % (block * radix) or local + block * radix > stop:
+                        break
+                    width += 1
+                    block *= radix
+                
+                yield self._decode(local // block, length - width), positions[length - width:]
+                local += block
+            
+            index = self._offsets[length] + stop
+    
+    def iter_range(self, start: int, end: int) -> Generator[bytes, None, None]:
+        """Yield candidates for indices [start, end)"""
+        for prefix, positions in self.iter_groups(start, end):
+            yield from _expand_group(prefix, positions)
+    
+    def ranges(self, chunk_size: int, start: int = 0) -> Generator[Tuple[int, int], None, None]:
+        """Split [start, size) into [start, end) work ranges"""
+        chunk_size = max(1, chunk_size)
+        for lo in range(start, self.size, chunk_size):
+            yield (lo, min(lo + chunk_size, self.size))
+    
+    def close(self):
+        """Nothing to release, same interface as MappedWordlist"""
+
+class BruteForceKeyspace(PositionalKeyspace):
+    """Every string of length min_length..max_length over one charset"""
+    
+    def __init__(self, max_length: int, charset: str = "MiniASCII", min_length: int = 1):
+        # Named set or a custom charset
+        self.charset = charset
+        self.chars = CHARSETS.get(charset, charset)
+        symbols = [char.encode('utf-8') for char in self.chars]
+        super().__init__([symbols] * max_length, min_length, max_length)
+    
+    @property
+    def spec(self) -> dict:
+        """JSON-able parameters, enough to rebuild the keyspace"""
+        spec = {"max_length": self.max_length, "charset": self.charset}
+        if self.min_length != 1:
+            spec["min_length"] = self.min_length
+        return spec
+
+# Hashcat-style mask placeholders
+MASK_CHARSETS = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "s": " " + string.punctuation,
+    "a": string.ascii_lowercase + string.ascii_uppercase + string.digits + " " + string.punctuation,
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+}
+
+def _expand_mask_charset(spec: str, custom: dict) -> List[bytes]:
+    """Symbols for a charset spec like "?l?d_", de-duplicated in order"""
+    symbols = []
+    i = 0
+    while i < len(spec):
+        char = spec[i]
+        if char == "?" and i + 1 < len(spec):
+            key = spec[i + 1]
+            i += 2
+            if key in MASK_CHARSETS:
+                symbols.extend(c.encode('utf-8') for c in MASK_CHARSETS[key])
+            elif key == "b":
+                symbols.extend(bytes([b]) for b in range(256))
+            elif key in custom:
+                symbols.extend(custom[key])
+            elif key == "?":
+                symbols.append(b"?")
+            else:
+                raise ValueError(f"Unknown mask placeholder: ?{key}")
+        else:
+            symbols.append(char.encode('utf-8'))
+            i += 1
+    return list(dict.fromkeys(symbols))
+
+def parse_mask(mask: str, custom_charsets: Optional[List[Optional[str]]] = None) -> List[List[bytes]]:
+    """
+    Per-position symbol lists for a mask: ?l ?u ?d ?s ?a ?h ?H ?b, ?1..?4 for
+    custom charsets, ?? for a literal '?', anything else is a literal.
+    """
+    custom = {}
+    for number, spec in enumerate(custom_charsets or [], 1):
+        if spec:
+            # Custom charsets may use the built-in placeholders, not each other
+            custom[str(number)] = _expand_mask_charset(spec, {})
+    
+    positions = []
+    i = 0
+    while i < len(mask):
+        if mask[i] == "?":
+            if i + 1 >= len(mask):
+                raise ValueError("Mask ends with a lone '?'")
+            key = mask[i + 1]
+            if key.isdigit() and key not in custom:
+                raise ValueError(f"Custom charset ?{key} is not defined")
+            positions.append(_expand_mask_charset(mask[i:i + 2], custom))
+            i += 2
+        else:
+            positions.append([mask[i].encode('utf-8')])
+            i += 1
+    
+    if not positions:
+        raise ValueError("Mask is empty")
+    return positions
+
+class MaskKeyspace(PositionalKeyspace):
+    """
+    Mask attack keyspace. Without increment only the full mask length is tried;
+    with increment every prefix length from min_length to max_length is. Like
+    hashcat, the length bounds are refused without increment.
+    """
+    
+    def __init__(self, mask: str, custom_charsets: Optional[List[Optional[str]]] = None,
+                 increment: bool = False, min_length: Optional[int] = None,
+                 max_length: Optional[int] = None):
+        self.mask = mask
+        self.custom_charsets = list(custom_charsets or [])
+        positions = parse_mask(mask, custom_charsets)
+        if not increment and (min_length is not None or max_length is not None):
+            raise ValueError("Increment length bounds need increment")
+        
+        max_length = min(max_length or len(positions), len(positions))
+        if increment:
+            min_length = min_length or 1
+        else:
+            min_length = max_length
+        super().__init__(positions, min_length, max_length)
+    
+    @property
+    def spec(self) -> dict:
+        """JSON-able parameters, enough to rebuild the keyspace"""
+        return {"mask": self.mask, "custom_charsets": self.custom_charsets,
+                "min_length": self.min_length, "max_length": self.max_length}
+
+def keyspace_from_spec(mode: 'AttackMode', spec: dict) -> PositionalKeyspace:
+    """Rebuild a brute force, mask or Markov keyspace from its spec"""
+    if mode == AttackMode.BRUTEFORCE:
+        return BruteForceKeyspace(spec["max_length"], spec["charset"], spec.get("min_length", 1))
+    if mode == AttackMode.MASK:
+        return MaskKeyspace(spec["mask"], spec["custom_charsets"], True,
+                            spec["min_length"], spec["max_length"])
+    if mode == AttackMode.MARKOV:
+        keyspace = MarkovKeyspace(MarkovModel.load(spec["model"]), spec["min_length"], spec["max_length"],
+                                  spec.get("threshold"), spec.get("max_level"))
+        if keyspace.spec != spec:
+            raise ValueError(f"Markov model {spec['model']} differs from the one the attack was started with")
+        return keyspace
+    raise ValueError(f"No index-addressable keyspace for {mode.value} attacks")
+
+class MarkovModel:
+    """
+    Per-position character transition counts trained from a wordlist:
+    counts[position][previous][next], previous == len(alphabet) at the start
+    of a word. Positions past the last trained one reuse its statistics.
+    Saved as a small zlib-compressed binary file.
+    """
+    
+    MAGIC = b"PWMARKV1"
+    HEADER = struct.Struct("<8sHH")
+    DEFAULT_ALPHABET = bytes(range(0x20, 0x7F))
+    
+    def __init__(self, alphabet: bytes, counts: List[List[List[int]]], path: Optional[str] = None):
+        self.alphabet = alphabet
+        self.counts = counts
+        self.positions = len(counts)
+        self.path = path
+    
+    @classmethod
+    def train(cls, wordlist_path: str, positions: int = 16,
+              alphabet: bytes = DEFAULT_ALPHABET) -> 'MarkovModel':
+        """Count transitions over every line that only uses alphabet"""
+        index = {byte: i for i, byte in enumerate(alphabet)}
+        start = len(alphabet)
+        counts = [[[0] * len(alphabet) for _ in range(start + 1)] for _ in range(positions)]
+        
+        wordlist = open_wordlist(wordlist_path)
+        try:
+            for word in wordlist.iter_range(0, wordlist.size):
+                try:
+                    symbols = [index[byte] for byte in word]
+                except KeyError:
+                    continue
+                prev = start
+                for position, symbol in enumerate(symbols):
+                    counts[min(position, positions - 1)][prev][symbol] += 1
+                    prev = symbol
+        finally:
+            wordlist.close()
+        return cls(alphabet, counts)
+    
+    @classmethod
+    def load(cls, path: str) -> 'MarkovModel':
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            magic, positions, size = cls.HEADER.unpack_from(data)
+            if magic != cls.MAGIC:
+                raise ValueError("not a Markov model")
+            alphabet = data[cls.HEADER.size:cls.HEADER.size + size]
+            flat = struct.unpack(f"<{positions * (size + 1) * size}L",
+                                 zlib.decompress(data[cls.HEADER.size + size:]))
+        except (struct.error, zlib.error, ValueError) as e:
+            raise ValueError(f"Corrupt Markov model {path}: {e}")
+        
+        row = size
+        table = size * (size + 1)
+        counts = [[list(flat[p * table + prev * row:p * table + (prev + 1) * row]) for prev in range(size + 1)]
+                  for p in range(positions)]
+        return cls(alphabet, counts, os.path.abspath(path))
+    
+    def save(self, path: str):
+        size = len(self.alphabet)
+        flat = [min(count, 0xFFFFFFFF) for table in self.counts for row in table for count in row]
+        payload = zlib.compress(struct.pack(f"<{len(flat)}L", *flat), 9)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.positions, size) + self.alphabet + payload)
+        os.replace(tmp_path, path)
+        self.path = os.path.abspath(path)
+    
+    def digest(self) -> str:
+        digest = hashlib.sha256(self.alphabet)
+        for table in self.counts:
+            for row in table:
+                digest.update(struct.pack(f"<{len(row)}L", *(min(count, 0xFFFFFFFF) for count in row)))
+        return digest.hexdigest()[:16]
+    
+    def successors(self, position: int, prev: int, levels: int) -> List[Tuple[int, int]]:
+        """(next symbol, level) pairs, most likely first. A level is the bits of surprise, capped"""
+        row = self.counts[min(position, self.positions - 1)][prev]
+        if not any(row):
+            # Nothing seen here, fall back to this previous symbol at any position, then uniform
+            row = [sum(table[prev][i] for table in self.counts) for i in range(len(self.alphabet))]
+        total = sum(row)
+        size = len(self.alphabet)
+        
+        ranked = []
+        for symbol, count in enumerate(row):
+            # Light smoothing so unseen transitions stay possible at the last level
+            probability = (count + 0.01) / (total + 0.01 * size)
+            ranked.append((min(levels - 1, int(-math.log2(probability))), -count, symbol))
+        ranked.sort()
+        return [(symbol, level) for level, _, symbol in ranked]
+
+class MarkovKeyspace(PositionalKeyspace):
+    """
+    Markov brute force in (approximately) descending probability, index-addressable.
+    Candidates are ordered by total level (sum of per-transition levels, so
+    roughly -log2 of the probability), then length, then most likely symbol
+    first. threshold keeps only the N most likely next symbols per state and
+    max_level drops everything less likely than that total. Counts per level
+    are generating polynomials packed into big ints, so any index range can be
+    reached by skipping whole subtrees. Only the order differs from
+    PositionalKeyspace, ranges and iter_range come from there.
+    """
+    
+    LEVELS = 11
+    
+    def __init__(self, model: MarkovModel, min_length: int, max_length: int,
+                 threshold: Optional[int] = None, max_level: Optional[int] = None):
+        if min_length < 1 or max_length < min_length:
+            raise ValueError(f"Invalid length range: {min_length}..{max_length}")
+        self.model = model
+        self.min_length = min_length
+        self.max_length = max_length
+        self.threshold = threshold
+        self.max_level = max_level
+        
+        size = len(model.alphabet)
+        self._start = size
+        self._symbols = [bytes([byte]) for byte in model.alphabet]
+        top_level = max_level if max_level is not None else (self.LEVELS - 1) * max_length
+        self._budget = top_level
+        
+        # Coefficient width: enough bits for the largest count of any length
+        self._width = max(1, math.ceil(max_length * math.log2(max(2, threshold or size)))) + 1
+        coefficient_mask = (1 << self._width) - 1
+        poly_mask = (1 << (self._width * (top_level + 1))) - 1
+        
+        # Successors per (stats position, previous symbol), cut to the threshold
+        stats_positions = min(max_length, model.positions)
+        self._successors = []
+        for position in range(stats_positions):
+            rows = []
+            for prev in range(size + 1):
+                if position == 0 and prev != size or position > 0 and prev == size:
+                    rows.append([])
+                    continue
+                ranked = model.successors(position, prev, self.LEVELS)
+                rows.append(ranked[:threshold] if threshold else ranked)
+            self._successors.append(rows)
+        
+        # completions[length][position][prev]: polynomial over remaining level budget
+        self._completions = {}
+        self._segments = []
+        for length in range(min_length, max_length + 1):
+            table = [None] * (length + 1)
+            table[length] = [1] * (size + 1)
+            for position in range(length - 1, -1, -1):
+                successors = self._successors_at(position)
+                following = table[position + 1]
+                row = [0] * (size + 1)
+                for prev in range(size + 1):
+                    total = 0
+                    for symbol, level in successors[prev]:
+                        if level <= top_level:
+                            total += following[symbol] << (level * self._width)
+                    row[prev] = total & poly_mask
+                table[position] = row
+            self._completions[length] = table
+        
+        # Global order: level, then length
+        offset = 0
+        for level in range(top_level + 1):
+            for length in range(min_length, max_length + 1):
+                count = (self._completions[length][0][size] >> (level * self._width)) & coefficient_mask
+                if count:
+                    self._segments.append((offset, level, length, count))
+                    offset += count
+        self._offsets = [segment[0] for segment in self._segments]
+        self.size = offset
+    
+    def _successors_at(self, position: int) -> List[List[Tuple[int, int]]]:
+        return self._successors[min(position, len(self._successors) - 1)]
+    
+    def _count(self, poly: int, level: int) -> int:
+        if level < 0:
+            return 0
+        return (poly >> (level * self._width)) & ((1 << self._width) - 1)
+    
+    @property
+    def spec(self) -> dict:
+        """JSON-able parameters, enough to rebuild the keyspace"""
+        return {"model": self.model.path, "digest": self.model.digest(), "min_length": self.min_length,
+                "max_length": self.max_length, "threshold": self.threshold, "max_level": self.max_level}
+    
+    def _walk(self, length: int, position: int, prev: int, budget: int, prefix: bytes,
+              skip: int, take: int) -> Generator[Tuple[bytes, List[List[bytes]]], None, None]:
+        """Groups for candidates [skip, skip + take) of the subtree below prefix"""
+        symbols = self._symbols
+        if position == length - 1:
+            # Last symbol must use up the budget exactly
+            leaf = [symbols[symbol] for symbol, level in self._successors_at(position)[prev] if level == budget]
+            yield prefix, [leaf[skip:skip + take]]
+            return
+        
+        following = self._completions[length][position + 1]
+        for symbol, level in self._successors_at(position)[prev]:
+            if level > budget:
+                break
+            count = self._count(following[symbol], budget - level)
+            if skip >= count:
+                skip -= count
+                continue
+            part = min(take, count - skip)
+            yield from self._walk(length, position + 1, symbol, budget - level,
+                                  prefix + symbols[symbol], skip, part)
+            take -= part
+            skip = 0
+            if take == 0:
+                return
+    
+    def candidate(self, index: int) -> bytes:
+        """Candidate at a global index"""
+        if not 0 <= index < self.size:
+            raise IndexError(f"Keyspace index out of range: {index}")
+        for prefix, positions in self.iter_groups(index, index + 1):
+            return prefix + positions[0][0]
+    
+    def index(self, candidate: Union[str, bytes]) -> int:
+        """Global index of a candidate"""
+        if isinstance(candidate, str):
+            candidate = candidate.encode('utf-8')
+        missing = ValueError(f"Candidate {candidate!r} is not in the keyspace")
+        if not self.min_length <= len(candidate) <= self.max_length:
+            raise missing
+        
+        # The levels along the path give the segment
+        path = []
+        prev = self._start
+        for position, byte in enumerate(candidate):
+            levels = dict(self._successors_at(position)[prev])
+            symbol = self.model.alphabet.find(byte)
+            if symbol not in levels:
+                raise missing
+            path.append((symbol, levels[symbol]))
+            prev = symbol
+        total = sum(level for _, level in path)
+        if total > self._budget:
+            raise missing
+        
+        # Count what _walk yields before it within the segment
+        local = 0
+        budget = total
+        prev = self._start
+        for position, (symbol, level) in enumerate(path):
+            successors = self._successors_at(position)[prev]
+            siblings = successors[:successors.index((symbol, level))]
+            if position == len(path) - 1:
+                local += sum(1 for _, sibling_level in siblings if sibling_level == budget)
+                break
+            following = self._completions[len(path)][position + 1]
+            for sibling, sibling_level in siblings:
+                local += self._count(following[sibling], budget - sibling_level)
+            budget -= level
+            prev = symbol
+        
+        for offset, level, length, _ in self._segments:
+            if (level, length) == (total, len(path)):
+                return offset + local
+        raise missing
+    
+    def iter_groups(self, start: int, end: int) -> Generator[Tuple[bytes, List[List[bytes]]], None, None]:
+        """(prefix, [last symbols]) groups covering [start, end) in index order"""
+        start = max(start, 0)
+        end = min(end, self.size)
+        segment = max(0, bisect.bisect_right(self._offsets, start) - 1)
+        while start < end and segment < len(self._segments):
+            offset, level, length, count = self._segments[segment]
+            take = min(end, offset + count) - start
+            yield from self._walk(length, 0, self._start, level, b"", start - offset, take)
+            start += take
+            segment += 1
+
+class _MappedFile:
+    """
+    Memory mapping of self.path, opened lazily on the first _mapping() call
+    so the object can be pickled into worker processes, which map the file
+    themselves. Writable mappings are flushed on close().
+    """
+    
+    _writable = False
+    _file = None
+    _map = None
+    
+    def _mapping(self) -> mmap.mmap:
+        if self._map is None:
+            self._file = open(self.path, 'r+b' if self._writable else 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_WRITE if self._writable else mmap.ACCESS_READ)
+        return self._map
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_file'] = None
+        state['_map'] = None
+        return state
+    
+    def close(self):
+        if self._map is not None:
+            if self._writable:
+                self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+
+class MappedWordlist(_MappedFile):
+    """
+    Memory-mapped wordlist read as raw bytes, with no decode/encode round trip.
+    Positions are byte offsets: ranges() cuts the file into newline-aligned
+    [start, end) slices and each worker scans its own slice from the mapping.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            self.size = os.path.getsize(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Wordlist file not found: {path}")
+        
+        # Average line length, to turn "candidates per batch" into bytes
+        sample = self._mapping()[:1 << 16] if self.size else b""
+        lines = sample.count(b"\n")
+        self.bytes_per_line = max(1, len(sample) // lines) if lines else max(1, len(sample))
+    
+    def align(self, offset: int) -> int:
+        """Start of the first line at or after offset"""
+        if offset <= 0:
+            return 0
+        if offset >= self.size:
+            return self.size
+        mapping = self._mapping()
+        if mapping[offset - 1] == 0x0A:
+            return offset
+        newline = mapping.find(b"\n", offset)
+        return self.size if newline < 0 else newline + 1
+    
+    def ranges(self, lines_per_range: int, start: int = 0) -> Generator[Tuple[int, int], None, None]:
+        """Split [start, size) into newline-aligned [start, end) byte ranges"""
+        chunk = max(1, lines_per_range) * self.bytes_per_line
+        lo = self.align(start)
+        while lo < self.size:
+            hi = self.align(lo + chunk)
+            yield (lo, hi)
+            lo = hi
+    
+    def iter_range(self, start: int, end: int) -> Generator[bytes, None, None]:
+        """Yield the stripped, non-blank lines in [start, end)"""
+        if start >= end:
+            return
+        mapping = self._mapping()
+        find = mapping.find
+        pos = start
+        while pos < end:
+            newline = find(b"\n", pos, end)
+            if newline < 0:
+                newline = end
+            password = mapping[pos:newline].strip()
+            if password:
+                yield password
+            pos = newline + 1
+
+class CompiledWordlist(_MappedFile):
+    """
+    Wordlist written by compile_wordlist(): deduplicated words grouped into
+    one bucket per length, stored back to back without separators, behind a
+    header with the total count and each bucket's (length, count, offset).
+    Positions are candidate indexes, so ranges split evenly and progress is
+    exact. min_length/max_length drop whole buckets without reading them.
+    """
+    
+    MAGIC = b"PWWLIST1"
+    HEADER = struct.Struct("<8sQI")
+    BUCKET = struct.Struct("<IQQ")
+    
+    # One position per candidate (MappedWordlist counts bytes)
+    bytes_per_line = 1
+    
+    def __init__(self, path: str, min_length: Optional[int] = None, max_length: Optional[int] = None):
+        self.path = path
+        self.min_length = min_length
+        self.max_length = max_length
+        
+        try:
+            with open(path, 'rb') as f:
+                magic, self.total, count = self.HEADER.unpack(f.read(self.HEADER.size))
+                if magic != self.MAGIC:
+                    raise ValueError(f"Not a compiled wordlist: {path}")
+                table = f.read(self.BUCKET.size * count)
+            buckets = [self.BUCKET.unpack_from(table, i * self.BUCKET.size) for i in range(count)]
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Wordlist file not found: {path}")
+        except struct.error:
+            raise ValueError(f"Truncated compiled wordlist: {path}")
+        
+        # (first index, length, count, byte offset) of every bucket in range
+        self._buckets = []
+        self.size = 0
+        for length, words, offset in buckets:
+            if min_length is not None and length < min_length or max_length is not None and length > max_length:
+                continue
+            self._buckets.append((self.size, length, words, offset))
+            self.size += words
+        self._starts = [bucket[0] for bucket in self._buckets]
+    
+    @property
+    def lengths(self) -> List[Tuple[int, int]]:
+        """(length, word count) of the buckets in range"""
+        return [(length, words) for _, length, words, _ in self._buckets]
+    
+    def ranges(self, candidates_per_range: int, start: int = 0) -> Generator[Tuple[int, int], None, None]:
+        """Split [start, size) into [start, end) index ranges"""
+        chunk = max(1, candidates_per_range)
+        for lo in range(start, self.size, chunk):
+            yield (lo, min(lo + chunk, self.size))
+    
+    def iter_range(self, start: int, end: int) -> Generator[bytes, None, None]:
+        """Yield the words with index in [start, end)"""
+        end = min(end, self.size)
+        if start >= end:
+            return
+        mapping = self._mapping()
+        bucket = bisect.bisect_right(self._starts, start) - 1
+        while start < end:
+            first, length, words, offset = self._buckets[bucket]
+            stop = min(end, first + words)
+            data = mapping[offset + (start - first) * length:offset + (stop - first) * length]
+            for pos in range(0, len(data), length):
+                yield data[pos:pos + length]
+            start = stop
+            bucket += 1
+
+def is_compiled_wordlist(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(CompiledWordlist.MAGIC)) == CompiledWordlist.MAGIC
+    except OSError:
+        return False
+
+def open_wordlist(path: str, min_length: Optional[int] = None,
+                  max_length: Optional[int] = None) -> Union[MappedWordlist, CompiledWordlist]:
+    """CompiledWordlist for compiled files, MappedWordlist for plain text"""
+    if is_compiled_wordlist(path):
+        return CompiledWordlist(path, min_length, max_length)
+    if min_length is not None or max_length is not None:
+        raise ValueError("Length limits need a compiled wordlist (wordlist compile)")
+    return MappedWordlist(path)
+
+# Spill records are (index within the length bucket, word); big-endian so
+# records sort by index as plain bytes
+_SPILL_INDEX = struct.Struct(">Q")
+
+# Bytes of spill records deduplicated with one in-memory set, and how many
+# hash partitions a larger spill file is split into per level
+_COMPILE_MEMORY = 32 << 20
+_COMPILE_FANOUT = 64
+
+def _spill_records(path: str, size: int) -> Generator[bytes, None, None]:
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(size * 4096)
+            if not data:
+                return
+            for pos in range(0, len(data), size):
+                yield data[pos:pos + size]
+
+def _keep_first(path: str, length: int, depth: int = 0) -> str:
+    """
+    First occurrence of every word in a spill file of one length, which is
+    in index order. Returns a file of the kept records, still in index order.
+    A file too big for one set is split by word hash first, so every copy of
+    a word lands in the same part, and the parts are merged back on the index.
+    """
+    size = _SPILL_INDEX.size + length
+    kept_path = path + ".k"
+    if os.path.getsize(path) > _COMPILE_MEMORY and depth < 4:
+        part_paths = [f"{path}.{i}" for i in range(_COMPILE_FANOUT)]
+        parts = [open(part_path, 'wb') for part_path in part_paths]
+        try:
+            for record in _spill_records(path, size):
+                parts[hash((depth, record[_SPILL_INDEX.size:])) % _COMPILE_FANOUT].write(record)
+        finally:
+            for part in parts:
+                part.close()
+        os.remove(path)
+        
+        kept_parts = [_keep_first(part_path, length, depth + 1) for part_path in part_paths]
+        with open(kept_path, 'wb') as out:
+            out.writelines(heapq.merge(*(_spill_records(part, size) for part in kept_parts)))
+        for part in kept_parts:
+            os.remove(part)
+        return kept_path
+    
+    # The set only holds distinct words, repeats of one word stream through
+    seen = set()
+    with open(kept_path, 'wb') as out:
+        for record in _spill_records(path, size):
+            word = record[_SPILL_INDEX.size:]
+            if word not in seen:
+                seen.add(word)
+                out.write(record)
+    os.remove(path)
+    return kept_path
+
+def compile_wordlist(source_path: str, target_path: str) -> Tuple[int, int]:
+    """
+    Write source_path (plain text) as a CompiledWordlist, keeping the first
+    occurrence of every word in its original order within its length.
+    Words are spilled to one temporary file per length first and deduplicated
+    from there in hash partitions of bounded size, so memory use does not grow
+    with the wordlist. Returns (unique words, duplicates).
+    """
+    wordlist = MappedWordlist(source_path)
+    spill_dir = tempfile.mkdtemp(prefix=".pwwlist-", dir=os.path.dirname(os.path.abspath(target_path)))
+    spills = {}
+    counts = {}
+    tmp_path = target_path + ".tmp"
+    try:
+        try:
+            for word in wordlist.iter_range(0, wordlist.size):
+                length = len(word)
+                spill = spills.get(length)
+                if spill is None:
+                    spill = spills[length] = open(os.path.join(spill_dir, str(length)), 'wb')
+                    counts[length] = 0
+                spill.write(_SPILL_INDEX.pack(counts[length]) + word)
+                counts[length] += 1
+        finally:
+            wordlist.close()
+        for spill in spills.values():
+            spill.close()
+        
+        lengths = sorted(spills)
+        table_size = CompiledWordlist.HEADER.size + CompiledWordlist.BUCKET.size * len(lengths)
+        buckets = []
+        total = 0
+        with open(tmp_path, 'wb') as out:
+            out.seek(table_size)
+            for length in lengths:
+                size = _SPILL_INDEX.size + length
+                kept = _keep_first(spills[length].name, length)
+                words = os.path.getsize(kept) // size
+                buckets.append(CompiledWordlist.BUCKET.pack(length, words, out.tell()))
+                out.writelines(record[_SPILL_INDEX.size:] for record in _spill_records(kept, size))
+                os.remove(kept)
+                total += words
+            out.seek(0)
+            out.write(CompiledWordlist.HEADER.pack(CompiledWordlist.MAGIC, total, len(lengths)))
+            out.write(b"".join(buckets))
+        os.replace(tmp_path, target_path)
+        return total, sum(counts.values()) - total
+    except BaseException:
+        # No half-written output left behind, on errors or Ctrl+C alike
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        for spill in spills.values():
+            spill.close()
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+# Rule positions: 0-9 then A-Z for 10-35
+_RULE_POSITIONS = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Argument layout per rule function: N = position, X = character
+_RULE_ARGS = {
+    ":": "", "l": "", "u": "", "c": "", "C": "", "t": "", "T": "N", "r": "", "d": "",
+    "p": "N", "f": "", "{": "", "}": "", "$": "X", "^": "X", "[": "", "]": "",
+    "D": "N", "x": "NN", "O": "NN", "i": "NX", "o": "NX", "'": "N", "s": "XX",
+    "@": "X", "z": "N", "Z": "N", "q": "", "k": "", "K": "", "*": "NN", "E": "",
+    "y": "N", "Y": "N", "+": "N", "-": "N", "L": "N", "R": "N", ".": "N", ",": "N",
+    "<": "N", ">": "N", "_": "N", "!": "X", "/": "X", "(": "X", ")": "X",
+}
+
+def parse_rule(rule: bytes) -> Tuple[Tuple[str, tuple], ...]:
+    """Parse one hashcat-style rule line into (function, args) steps"""
+    steps = []
+    i = 0
+    while i < len(rule):
+        op = chr(rule[i])
+        i += 1
+        if op in " \t":
+            continue
+        if op not in _RULE_ARGS:
+            raise ValueError(f"Unknown rule function {op!r} in {rule!r}")
+        args = []
+        for kind in _RULE_ARGS[op]:
+            if i >= len(rule):
+                raise ValueError(f"Missing argument for {op!r} in {rule!r}")
+            if kind == "N":
+                position = _RULE_POSITIONS.find(rule[i:i + 1])
+                if position < 0:
+                    raise ValueError(f"Bad position {chr(rule[i])!r} in {rule!r}")
+                args.append(position)
+            else:
+                args.append(rule[i:i + 1])
+            i += 1
+        steps.append((op, tuple(args)))
+    return tuple(steps)
+
+def _toggle(char: int) -> int:
+    if 0x41 <= char <= 0x5A or 0x61 <= char <= 0x7A:
+        return char ^ 0x20
+    return char
+
+def _apply_step(word: bytes, op: str, args: tuple) -> Optional[bytes]:
+    """One rule function, None rejects the candidate. Out of range positions are no-ops"""
+    n = len(word)
+    if op == ":":
+        return word
+    if op == "l":
+        return word.lower()
+    if op == "u":
+        return word.upper()
+    if op == "c":
+        return word[:1].upper() + word[1:].lower()
+    if op == "C":
+        return word[:1].lower() + word[1:].upper()
+    if op == "t":
+        return word.swapcase()
+    if op == "T":
+        p = args[0]
+        return word if p >= n else word[:p] + bytes([_toggle(word[p])]) + word[p + 1:]
+    if op == "r":
+        return word[::-1]
+    if op == "d":
+        return word + word
+    if op == "p":
+        return word * (args[0] + 1)
+    if op == "f":
+        return word + word[::-1]
+    if op == "{":
+        return word[1:] + word[:1]
+    if op == "}":
+        return word[-1:] + word[:-1]
+    if op == "$":
+        return word + args[0]
+    if op == "^":
+        return args[0] + word
+    if op == "[":
+        return word[1:]
+    if op == "]":
+        return word[:-1]
+    if op == "D":
+        return word[:args[0]] + word[args[0] + 1:]
+    if op == "x":
+        p, length = args
+        return word if p >= n else word[p:p + length]
+    if op == "O":
+        p, length = args
+        return word if p >= n else word[:p] + word[p + length:]
+    if op == "i":
+        p, char = args
+        return word if p > n else word[:p] + char + word[p:]
+    if op == "o":
+        p, char = args
+        return word if p >= n else word[:p] + char + word[p + 1:]
+    if op == "'":
+        return word[:args[0]]
+    if op == "s":
+        return word.replace(args[0], args[1])
+    if op == "@":
+        return word.replace(args[0], b"")
+    if op == "z":
+        return word[:1] * args[0] + word
+    if op == "Z":
+        return word + word[-1:] * args[0]
+    if op == "q":
+        return bytes(b for char in word for b in (char, char))
+    if op == "k":
+        return word if n < 2 else word[1:2] + word[:1] + word[2:]
+    if op == "K":
+        return word if n < 2 else word[:-2] + word[-1:] + word[-2:-1]
+    if op == "*":
+        a, b = args
+        if a >= n or b >= n:
+            return word
+        chars = bytearray(word)
+        chars[a], chars[b] = chars[b], chars[a]
+        return bytes(chars)
+    if op == "E":
+        out = bytearray(word.lower())
+        for i in range(len(out)):
+            if i == 0 or out[i - 1] == 0x20:
+                out[i:i + 1] = bytes(out[i:i + 1]).upper()
+        return bytes(out)
+    if op == "y":
+        return word[:args[0]] + word
+    if op == "Y":
+        return word + (word[-args[0]:] if args[0] else b"")
+    if op in "+-LR.,":
+        p = args[0]
+        if p >= n:
+            return word
+        char = word[p]
+        if op == "+":
+            char = (char + 1) & 0xFF
+        elif op == "-":
+            char = (char - 1) & 0xFF
+        elif op == "L":
+            char = (char << 1) & 0xFF
+        elif op == "R":
+            char >>= 1
+        elif op == ".":
+            char = word[p + 1] if p + 1 < n else char
+        else:
+            char = word[p - 1] if p > 0 else char
+        return word[:p] + bytes([char]) + word[p + 1:]
+    # Rejection functions
+    if op == "<":
+        return word if n <= args[0] else None
+    if op == ">":
+        return word if n >= args[0] else None
+    if op == "_":
+        return word if n == args[0] else None
+    if op == "!":
+        return None if args[0] in word else word
+    if op == "/":
+        return word if args[0] in word else None
+    if op == "(":
+        return word if word.startswith(args[0]) else None
+    if op == ")":
+        return word if word.endswith(args[0]) else None
+    raise ValueError(f"Unknown rule function {op!r}")
+
+class RuleSet:
+    """
+    Hashcat-style mangling rules (one rule per line, '#' comments), applied
+    lazily to each word. Parsed rules are plain tuples so a RuleSet pickles
+    into worker processes.
+    """
+    
+    def __init__(self, rules: List[Tuple[Tuple[str, tuple], ...]]):
+        if not rules:
+            raise ValueError("Rule set is empty")
+        self.rules = rules
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'RuleSet':
+        rules = []
+        with open(path, 'rb') as f:
+            for number, line in enumerate(f, 1):
+                line = line.rstrip(b"\r\n")
+                if not line.strip() or line.startswith(b"#"):
+                    continue
+                try:
+                    rules.append(parse_rule(line))
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: {e}")
+        return cls(rules)
+    
+    def __len__(self) -> int:
+        return len(self.rules)
+    
+    def apply(self, word: bytes) -> Generator[bytes, None, None]:
+        """Every distinct non-empty candidate the rules make from word"""
+        seen = set()
+        for rule in self.rules:
+            candidate = word
+            for op, args in rule:
+                candidate = _apply_step(candidate, op, args)
+                if candidate is None:
+                    break
+            if candidate and candidate not in seen:
+                seen.add(candidate)
+                yield candidate
+
+class RuledWordlist:
+    """
+    A MappedWordlist seen through a RuleSet: same byte-offset positions, but
+    each word expands to up to len(rules) candidates inside the worker.
+    """
+    
+    def __init__(self, wordlist: MappedWordlist, rules: RuleSet):
+        self.wordlist = wordlist
+        self.rules = rules
+        self.size = wordlist.size
+    
+    def ranges(self, candidates_per_range: int, start: int = 0) -> Generator[Tuple[int, int], None, None]:
+        """Byte ranges sized so each holds about candidates_per_range candidates"""
+        return self.wordlist.ranges(max(1, candidates_per_range // len(self.rules)), start)
+    
+    def iter_range(self, start: int, end: int) -> Generator[bytes, None, None]:
+        apply = self.rules.apply
+        for word in self.wordlist.iter_range(start, end):
+            yield from apply(word)
+    
+    def close(self):
+        self.wordlist.close()
+
+class HybridWordlist:
+    """
+    Every wordlist word combined with every mask candidate, mask appended or
+    prepended. Positions are wordlist byte offsets and each work unit is a
+    block of words expanded across the whole mask keyspace.
+    """
+    
+    def __init__(self, wordlist: MappedWordlist, mask: MaskKeyspace, prepend: bool = False):
+        self.wordlist = wordlist
+        self.mask = mask
+        self.prepend = prepend
+        self.size = wordlist.size
+    
+    def ranges(self, candidates_per_range: int, start: int = 0) -> Generator[Tuple[int, int], None, None]:
+        """Byte ranges sized so each holds about candidates_per_range candidates"""
+        return self.wordlist.ranges(max(1, candidates_per_range // self.mask.size), start)
+    
+    def iter_groups(self, start: int, end: int) -> Generator[Tuple[bytes, List[List[bytes]]], None, None]:
+        """
+        (prefix, positions) groups: each word followed by the mask positions when
+        appending, each mask candidate followed by the word block when prepending.
+        """
+        if not self.prepend:
+            for word in self.wordlist.iter_range(start, end):
+                for _, positions in self.mask.iter_groups(0, self.mask.size):
+                    yield word, positions
+            return
+        
+        words = list(self.wordlist.iter_range(start, end))
+        if words:
+            for prefix in self.mask.iter_range(0, self.mask.size):
+                yield prefix, [words]
+    
+    def iter_range(self, start: int, end: int) -> Generator[bytes, None, None]:
+        for prefix, positions in self.iter_groups(start, end):
+            yield from _expand_group(prefix, positions)
+    
+    def close(self):
+        self.wordlist.close()
 
 class Wordlist:
     def __init__(self):
@@ -28,70 +1197,1689 @@ class Wordlist:
     def get_from_file_generator(self, filename: str) -> Generator[str, None, None]:
         """Cross-platform file reading with generator"""
         try:
-            # Try UTF-8 first (Linux/macOS), fall back to latin-1 (Windows compatibility)
-            try:
-                with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
-                    for line in f:
-                        password = line.strip()
-                        if password:
-                            yield password
-            except UnicodeDecodeError:
-                # Fallback for Windows or odd encodings
-                with open(filename, 'r', encoding='latin-1', errors='ignore') as f:
-                    for line in f:
-                        password = line.strip()
-                        if password:
-                            yield password
+            wordlist = open_wordlist(filename)
         except FileNotFoundError:
-            raise FileNotFoundError(f"Wordlist file not found: {filename}")
+            raise
         except Exception as e:
             raise Exception(f"Cannot read wordlist: {e}")
+        # Only compiled wordlists know their word count up front
+        self.total = wordlist.size if isinstance(wordlist, CompiledWordlist) else 0
+        
+        def file_generator():
+            try:
+                # UTF-8 first (Linux/macOS), latin-1 per line for anything else (Windows)
+                for password in wordlist.iter_range(0, wordlist.size):
+                    yield decode_password(password)
+            finally:
+                wordlist.close()
+        
+        self.generator = file_generator()
+        return self.generator
     
     def get_from_length_generator(self, length: int, charset: str = "MiniASCII") -> Generator[str, None, None]:
         """Generate passwords for brute force"""
-        # Define character sets (same for all platforms)
-        charsets = {
-            "MiniASCII": string.ascii_lowercase + string.digits,
-            "lower": string.ascii_lowercase,
-            "upper": string.ascii_uppercase,
-            "letters": string.ascii_letters,
-            "alphanum": string.ascii_letters + string.digits,
-            "all": string.ascii_letters + string.digits + string.punctuation,
+        keyspace = BruteForceKeyspace(length, charset)
+        self.generator = (password.decode('utf-8') for password in keyspace.iter_range(0, keyspace.size))
+        self.total = keyspace.size
+        return self.generator
+    
+    def estimate_combinations(self, length: int, charset: str = "MiniASCII") -> int:
+        """Estimate total combinations"""
+        return BruteForceKeyspace(length, charset).size
+
+def format_duration(seconds: float) -> str:
+    """Compact duration like 3d04h, 2h05m or 4m09s"""
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return f"{days}d{hours:02d}h"
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    return f"{minutes}m{seconds:02d}s"
+
+def _make_crc_table() -> List[int]:
+    """CRC-32 lookup table used by the ZipCrypto key schedule"""
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xEDB88320 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+CRC_TABLE = _make_crc_table()
+
+# Local file header layout (APPNOTE 4.3.7)
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_MAGIC = b"PK\003\004"
+
+ZIPCRYPTO_INITIAL_KEYS = (0x12345678, 0x23456789, 0x34567890)
+
+def zipcrypto_update(data: bytes, keys: Tuple[int, int, int] = ZIPCRYPTO_INITIAL_KEYS,
+                     crc_table: List[int] = CRC_TABLE) -> Tuple[int, int, int]:
+    """Advance the three ZipCrypto key registers over data"""
+    k0, k1, k2 = keys
+    for c in data:
+        k0 = (k0 >> 8) ^ crc_table[(k0 ^ c) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ crc_table[(k2 ^ (k1 >> 24)) & 0xFF]
+    return k0, k1, k2
+
+def zipcrypto_headers_match(keys: Tuple[int, int, int], headers: List[Tuple[bytes, int]],
+                            crc_table: List[int] = CRC_TABLE) -> bool:
+    """Decrypt each 12-byte encryption header from keys, True if every check byte matches"""
+    k0, k1, k2 = keys
+    for header, check_byte in headers:
+        a, b, d = k0, k1, k2
+        for i in range(11):
+            t = (d | 2) & 0xFFFF
+            c = header[i] ^ (((t * (t ^ 1)) >> 8) & 0xFF)
+            a = (a >> 8) ^ crc_table[(a ^ c) & 0xFF]
+            b = ((b + (a & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+            d = (d >> 8) ^ crc_table[(d ^ (b >> 24)) & 0xFF]
+        t = (d | 2) & 0xFFFF
+        if header[11] ^ (((t * (t ^ 1)) >> 8) & 0xFF) != check_byte:
+            return False
+    return True
+
+def zipcrypto_check(password: bytes, headers: List[Tuple[bytes, int]],
+                    crc_table: List[int] = CRC_TABLE) -> bool:
+    """
+    Run the ZipCrypto key schedule for password and decrypt each 12-byte
+    encryption header. True if every header's last byte matches its check byte.
+    """
+    return zipcrypto_headers_match(zipcrypto_update(password, ZIPCRYPTO_INITIAL_KEYS, crc_table),
+                                   headers, crc_table)
+
+def zipcrypto_filter_numpy(passwords: List[bytes], headers: List[Tuple[bytes, int]]) -> List[int]:
+    """
+    Vectorized zipcrypto_check for a batch of same-length passwords.
+    All candidates advance their three key registers together as uint32 arrays;
+    returns the indices that pass every header check byte.
+    """
+    count = len(passwords)
+    if count == 0:
+        return []
+    table = _crc_table_numpy()
+    length = len(passwords[0])
+    columns = np.frombuffer(b"".join(passwords), dtype=np.uint8).reshape(count, length).T
+    
+    k0 = np.full(count, 0x12345678, dtype=np.uint32)
+    k1 = np.full(count, 0x23456789, dtype=np.uint32)
+    k2 = np.full(count, 0x34567890, dtype=np.uint32)
+    mult = np.uint32(134775813)
+    
+    # uint32 arithmetic wraps, which is exactly the & 0xFFFFFFFF of the scalar path
+    for column in columns:
+        k0 = (k0 >> 8) ^ table[(k0 ^ column) & 0xFF]
+        k1 = (k1 + (k0 & 0xFF)) * mult + 1
+        k2 = (k2 >> 8) ^ table[(k2 ^ (k1 >> 24)) & 0xFF]
+    
+    survivors = np.arange(count)
+    for header, check_byte in headers:
+        a, b, d = k0, k1, k2
+        for i in range(11):
+            t = (d | 2) & 0xFFFF
+            c = np.uint32(header[i]) ^ (((t * (t ^ 1)) >> 8) & 0xFF)
+            a = (a >> 8) ^ table[(a ^ c) & 0xFF]
+            b = (b + (a & 0xFF)) * mult + 1
+            d = (d >> 8) ^ table[(d ^ (b >> 24)) & 0xFF]
+        t = (d | 2) & 0xFFFF
+        passed = (np.uint32(header[11]) ^ (((t * (t ^ 1)) >> 8) & 0xFF)) == check_byte
+        
+        # Later headers only see the survivors of earlier ones
+        survivors = survivors[passed]
+        k0, k1, k2 = k0[passed], k1[passed], k2[passed]
+        if survivors.size == 0:
+            break
+    
+    return survivors.tolist()
+
+_CRC_TABLE_NUMPY = None
+
+def _crc_table_numpy():
+    global _CRC_TABLE_NUMPY
+    if _CRC_TABLE_NUMPY is None:
+        _CRC_TABLE_NUMPY = np.array(CRC_TABLE, dtype=np.uint32)
+    return _CRC_TABLE_NUMPY
+
+class ZipCryptoPrefilter:
+    """
+    Check-byte pre-filter for traditional PKWARE (ZipCrypto) archives.
+    Rejects ~255/256 wrong passwords per header without touching zipfile.
+    """
+    
+    def __init__(self, headers: List[Tuple[bytes, int]]):
+        self.headers = headers
+    
+    @classmethod
+    def from_zip(cls, zip_path: str, max_headers: int = 3) -> Optional['ZipCryptoPrefilter']:
+        """Read the encryption headers once, None if there are no ZipCrypto members"""
+        headers = []
+        with zipfile.ZipFile(zip_path) as zf:
+            members = [info for info in zf.infolist()
+                       if info.flag_bits & 0x1 and info.compress_type != AES_COMPRESS_TYPE]
+            members.sort(key=lambda info: info.compress_size)
+            
+            with open(zip_path, 'rb') as f:
+                for info in members[:max_headers]:
+                    f.seek(info.header_offset)
+                    fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+                    if fields[0] != _LOCAL_HEADER_MAGIC:
+                        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+                    
+                    # Skip name and extra field to reach the encryption header
+                    f.seek(fields[10] + fields[11], 1)
+                    header = f.read(12)
+                    if len(header) != 12:
+                        raise zipfile.BadZipFile(f"Truncated encryption header for {info.filename}")
+                    
+                    # Same check byte zipfile uses
+                    if info.flag_bits & 0x8:
+                        check_byte = (info._raw_time >> 8) & 0xFF
+                    else:
+                        check_byte = (info.CRC >> 24) & 0xFF
+                    headers.append((header, check_byte))
+        
+        return cls(headers) if headers else None
+    
+    def check(self, password: bytes) -> bool:
+        return zipcrypto_check(password, self.headers)
+
+def _make_aes_tables() -> Tuple[List[int], List[List[int]]]:
+    """AES S-box and the four encryption T-tables"""
+    sbox = [0] * 256
+    p = q = 1
+    while True:
+        # p walks the multiplicative group by 3, q tracks its inverse
+        p = (p ^ (p << 1) ^ (0x1B if p & 0x80 else 0)) & 0xFF
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xFF
+        if q & 0x80:
+            q ^= 0x09
+        x = q ^ ((q << 1) | (q >> 7)) ^ ((q << 2) | (q >> 6)) ^ ((q << 3) | (q >> 5)) ^ ((q << 4) | (q >> 4))
+        sbox[p] = (x ^ 0x63) & 0xFF
+        if p == 1:
+            break
+    sbox[0] = 0x63
+    
+    te0 = []
+    for s in sbox:
+        s2 = ((s << 1) ^ (0x1B if s & 0x80 else 0)) & 0xFF
+        te0.append((s2 << 24) | (s << 16) | (s << 8) | (s2 ^ s))
+    te1 = [(t >> 8) | ((t & 0xFF) << 24) for t in te0]
+    te2 = [(t >> 8) | ((t & 0xFF) << 24) for t in te1]
+    te3 = [(t >> 8) | ((t & 0xFF) << 24) for t in te2]
+    return sbox, [te0, te1, te2, te3]
+
+_AES_SBOX, _AES_TE = _make_aes_tables()
+
+class _AESBlockCipher:
+    """Pure-Python AES encryption (FIPS-197), enough for CTR mode"""
+    
+    def __init__(self, key: bytes):
+        if len(key) not in (16, 24, 32):
+            raise ValueError(f"Invalid AES key length: {len(key)}")
+        nk = len(key) // 4
+        self.rounds = nk + 6
+        sbox = _AES_SBOX
+        
+        words = [int.from_bytes(key[4 * i:4 * i + 4], 'big') for i in range(nk)]
+        rcon = 1
+        for i in range(nk, 4 * (self.rounds + 1)):
+            t = words[i - 1]
+            if i % nk == 0:
+                t = ((t << 8) & 0xFFFFFFFF) | (t >> 24)
+                t = (sbox[t >> 24] << 24 | sbox[(t >> 16) & 0xFF] << 16 |
+                     sbox[(t >> 8) & 0xFF] << 8 | sbox[t & 0xFF]) ^ (rcon << 24)
+                rcon = ((rcon << 1) ^ (0x1B if rcon & 0x80 else 0)) & 0xFF
+            elif nk > 6 and i % nk == 4:
+                t = (sbox[t >> 24] << 24 | sbox[(t >> 16) & 0xFF] << 16 |
+                     sbox[(t >> 8) & 0xFF] << 8 | sbox[t & 0xFF])
+            words.append(words[i - nk] ^ t)
+        self._round_keys = words
+    
+    def encrypt_block(self, block: bytes) -> bytes:
+        w = self._round_keys
+        te0, te1, te2, te3 = _AES_TE
+        sbox = _AES_SBOX
+        
+        s0 = int.from_bytes(block[0:4], 'big') ^ w[0]
+        s1 = int.from_bytes(block[4:8], 'big') ^ w[1]
+        s2 = int.from_bytes(block[8:12], 'big') ^ w[2]
+        s3 = int.from_bytes(block[12:16], 'big') ^ w[3]
+        for r in range(1, self.rounds):
+            k = 4 * r
+            t0 = te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xFF] ^ te2[(s2 >> 8) & 0xFF] ^ te3[s3 & 0xFF] ^ w[k]
+            t1 = te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xFF] ^ te2[(s3 >> 8) & 0xFF] ^ te3[s0 & 0xFF] ^ w[k + 1]
+            t2 = te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xFF] ^ te2[(s0 >> 8) & 0xFF] ^ te3[s1 & 0xFF] ^ w[k + 2]
+            t3 = te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xFF] ^ te2[(s1 >> 8) & 0xFF] ^ te3[s2 & 0xFF] ^ w[k + 3]
+            s0, s1, s2, s3 = t0, t1, t2, t3
+        
+        k = 4 * self.rounds
+        out = []
+        for a, b, c, d, key_word in ((s0, s1, s2, s3, w[k]), (s1, s2, s3, s0, w[k + 1]),
+                                     (s2, s3, s0, s1, w[k + 2]), (s3, s0, s1, s2, w[k + 3])):
+            word = (sbox[a >> 24] << 24 | sbox[(b >> 16) & 0xFF] << 16 |
+                    sbox[(c >> 8) & 0xFF] << 8 | sbox[d & 0xFF]) ^ key_word
+            out.append(word.to_bytes(4, 'big'))
+        return b"".join(out)
+
+class WinZipAESCTR:
+    """
+    AES in WinZip's CTR mode: 128-bit little-endian counter starting at 1.
+    Encryption and decryption are the same operation. Uses the cryptography
+    package for the block cipher when it is installed, pure Python otherwise.
+    """
+    
+    def __init__(self, key: bytes):
+        self._counter = 1
+        if _CryptographyCipher is not None:
+            self._encrypt_blocks = _CryptographyCipher(_cryptography_algorithms.AES(key),
+                                                       _cryptography_modes.ECB()).encryptor().update
+        else:
+            encrypt_block = _AESBlockCipher(key).encrypt_block
+            self._encrypt_blocks = lambda data: b"".join(
+                encrypt_block(data[i:i + 16]) for i in range(0, len(data), 16))
+    
+    def process(self, data: bytes) -> bytes:
+        """Every call but the last must pass a multiple of 16 bytes"""
+        blocks = (len(data) + 15) // 16
+        if blocks == 0:
+            return b""
+        counters = b"".join((self._counter + i).to_bytes(16, 'little') for i in range(blocks))
+        self._counter += blocks
+        keystream = self._encrypt_blocks(counters)[:len(data)]
+        return (int.from_bytes(data, 'little') ^ int.from_bytes(keystream, 'little')).to_bytes(len(data), 'little')
+
+# WinZip AES extra field and key sizes (AE-1/AE-2 specification)
+AES_EXTRA_ID = 0x9901
+AES_KEY_LENGTHS = {1: 16, 2: 24, 3: 32}
+AES_COMPRESS_TYPE = 99
+_AES_AUTH_LENGTH = 10
+_AES_ITERATIONS = 1000
+
+def parse_aes_extra(extra: bytes) -> Optional[Tuple[int, int, int]]:
+    """(vendor version, strength, actual compression method) from an extra field, None if absent"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, pos)
+        if header_id == AES_EXTRA_ID and size >= 7:
+            version, vendor, strength, compress_type = struct.unpack_from("<H2sBH", extra, pos + 4)
+            if vendor != b"AE" or strength not in AES_KEY_LENGTHS:
+                raise zipfile.BadZipFile("Malformed WinZip AES extra field")
+            return version, strength, compress_type
+        pos += 4 + size
+    return None
+
+class WinZipAESMember:
+    """
+    One WinZip AES (AE-1/AE-2) member. Salt, 2-byte password verifier and
+    auth code are read once from the archive. check() runs PBKDF2 and rejects
+    on the verifier before doing any HMAC or decryption work.
+    """
+    
+    def __init__(self, zip_path: str, info: zipfile.ZipInfo):
+        parsed = parse_aes_extra(info.extra)
+        if parsed is None:
+            raise zipfile.BadZipFile(f"No WinZip AES extra field for {info.filename}")
+        self.info = info
+        self.version, self.strength, self.compress_type = parsed
+        self.key_length = AES_KEY_LENGTHS[self.strength]
+        salt_length = self.key_length // 2
+        
+        with open(zip_path, 'rb') as f:
+            f.seek(info.header_offset)
+            fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            if fields[0] != _LOCAL_HEADER_MAGIC:
+                raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+            f.seek(fields[10] + fields[11], 1)
+            
+            self.salt = f.read(salt_length)
+            self.password_verifier = f.read(2)
+            self.data_offset = f.tell()
+            self.data_length = info.compress_size - salt_length - 2 - _AES_AUTH_LENGTH
+            if self.data_length < 0:
+                raise zipfile.BadZipFile(f"Truncated AES data for {info.filename}")
+            f.seek(self.data_length, 1)
+            self.auth_code = f.read(_AES_AUTH_LENGTH)
+        
+        self.zip_path = zip_path
+        self._ciphertext = None
+    
+    def derive_keys(self, password: bytes) -> Optional[Tuple[bytes, bytes]]:
+        """(encryption key, auth key), None if the password verifier does not match"""
+        length = self.key_length
+        key = hashlib.pbkdf2_hmac('sha1', password, self.salt, _AES_ITERATIONS, 2 * length + 2)
+        if key[2 * length:] != self.password_verifier:
+            return None
+        return key[:length], key[length:2 * length]
+    
+    def check(self, password: bytes) -> bool:
+        """PBKDF2 and the 2-byte verifier, then HMAC-SHA1 over the ciphertext for the ~1/65536 that pass"""
+        keys = self.derive_keys(password)
+        if keys is None:
+            return False
+        return self._authenticate(keys)
+    
+    def _authenticate(self, keys: Tuple[bytes, bytes]) -> bool:
+        if self._ciphertext is None:
+            with open(self.zip_path, 'rb') as f:
+                f.seek(self.data_offset)
+                self._ciphertext = f.read(self.data_length)
+        mac = hmac.new(keys[1], self._ciphertext, hashlib.sha1).digest()[:_AES_AUTH_LENGTH]
+        return hmac.compare_digest(mac, self.auth_code)
+    
+    def extract_to(self, password: bytes, target, chunk_size: int = 1 << 20):
+        """Decrypt, authenticate and decompress the member into a writable file object"""
+        keys = self.derive_keys(password)
+        if keys is None:
+            raise RuntimeError(f"Bad password for {self.info.filename}")
+        cipher = WinZipAESCTR(keys[0])
+        mac = hmac.new(keys[1], digestmod=hashlib.sha1)
+        decompressor = zipfile._get_decompressor(self.compress_type)
+        crc = 0
+        
+        with open(self.zip_path, 'rb') as f:
+            f.seek(self.data_offset)
+            remaining = self.data_length
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise zipfile.BadZipFile(f"Truncated AES data for {self.info.filename}")
+                remaining -= len(chunk)
+                mac.update(chunk)
+                data = cipher.process(chunk)
+                if decompressor is not None:
+                    data = decompressor.decompress(data)
+                crc = zlib.crc32(data, crc)
+                target.write(data)
+        
+        if decompressor is not None and hasattr(decompressor, 'flush'):
+            data = decompressor.flush()
+            crc = zlib.crc32(data, crc)
+            target.write(data)
+        
+        if not hmac.compare_digest(mac.digest()[:_AES_AUTH_LENGTH], self.auth_code):
+            raise zipfile.BadZipFile(f"Bad HMAC for {self.info.filename}")
+        # AE-2 stores 0 as CRC, only AE-1 has one to check
+        if self.version == 1 and crc != self.info.CRC:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for {self.info.filename}")
+
+def _extract_target_path(path: str, filename: str) -> str:
+    """Sanitized destination like ZipFile.extract: no drive, no absolute path, no '..'"""
+    arcname = filename.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = (x for x in arcname.split(os.path.sep) if x not in ('', os.path.curdir, os.path.pardir))
+    return os.path.join(path, *parts)
+
+def archive_encryption(zip_path: str) -> Optional[str]:
+    """"aes" or "zipcrypto" for the member the verifier will use, None if nothing is encrypted"""
+    with zipfile.ZipFile(zip_path) as zf:
+        encrypted = [info for info in zf.infolist() if info.flag_bits & 0x1]
+    if not encrypted:
+        return None
+    if all(info.compress_type == AES_COMPRESS_TYPE for info in encrypted):
+        return "aes"
+    return "zipcrypto"
+
+class ZipVerifier:
+    """
+    In-memory password check against the smallest encrypted member.
+    ZipCrypto members are preferred; WinZip AES is used when it is all there is.
+    A password that passes is confirmed on every other encrypted member before
+    it counts, the ones that fail that are kept in false_positives.
+    Nothing is written to disk; extract() is called once a password is confirmed.
+    """
+    
+    def __init__(self, zip_path: str, prefilter: Optional[ZipCryptoPrefilter] = None,
+                 vectorized: bool = False):
+        self.zip_path = zip_path
+        self.prefilter = prefilter
+        self.verify_seconds = 0.0
+        self.false_positives = []
+        
+        # Batches go through the NumPy pre-filter when there is one to vectorize
+        self.vectorized = vectorized and prefilter is not None and np is not None
+        self._zip = zipfile.ZipFile(zip_path)
+        
+        encrypted = [info for info in self._zip.infolist() if info.flag_bits & 0x1]
+        if not encrypted:
+            self._zip.close()
+            raise ValueError("Archive has no encrypted members")
+        
+        # The cheapest member to decrypt and decompress, ZipCrypto beats PBKDF2.
+        # An empty ZipCrypto member has only its check byte to reject on, so it
+        # is the last resort; an empty AES member still has its HMAC
+        zipcrypto = [info for info in encrypted
+                     if info.compress_type != AES_COMPRESS_TYPE and info.file_size > 0]
+        aes = [info for info in encrypted if info.compress_type == AES_COMPRESS_TYPE]
+        self.member = min(zipcrypto or aes or encrypted, key=lambda info: info.compress_size)
+        self._others = [info for info in encrypted if info is not self.member]
+        self._other_aes = {}
+        self.aes = None
+        try:
+            if self.member.compress_type == AES_COMPRESS_TYPE:
+                self.aes = WinZipAESMember(zip_path, self.member)
+                self.vectorized = False
+            elif self.member.compress_type not in zipfile.compressor_names:
+                raise NotImplementedError(
+                    f"Unsupported encryption/compression method: {self.member.compress_type}")
+        except Exception:
+            self._zip.close()
+            raise
+    
+    def check(self, password: bytes) -> bool:
+        """Return True if password decrypts the member and passes its CRC (or AES HMAC)"""
+        if self.aes is not None:
+            return self.aes.check(password) and self._confirm(password)
+        
+        # Cheap check-byte test first, zipfile only sees the survivors
+        if self.prefilter is not None and not self.prefilter.check(password):
+            return False
+        return self._check_member(password)
+    
+    @property
+    def incremental(self) -> bool:
+        """True if check_group() can reuse the key state of shared prefixes"""
+        return self.aes is None and self.prefilter is not None and not self.vectorized
+    
+    def check_group(self, prefix: bytes, positions: List[List[bytes]]) -> Tuple[int, Optional[bytes]]:
+        """
+        Try prefix + one symbol from each position, in product order.
+        Returns (attempts, password or None). With the ZipCrypto pre-filter the
+        candidates are walked depth-first with the key state cached per level,
+        so each one costs a single symbol update plus the header check.
+        """
+        if not self.incremental:
+            tried = 0
+            for password in _expand_group(prefix, positions):
+                tried += 1
+                if self.check(password):
+                    return tried, password
+            return tried, None
+        
+        state = zipcrypto_update(prefix)
+        if not positions:
+            if zipcrypto_headers_match(state, self.prefilter.headers) and self._check_member(prefix):
+                return 1, prefix
+            return 1, None
+        return self._walk(state, prefix, positions)
+    
+    def _walk(self, state: Tuple[int, int, int], prefix: bytes,
+              positions: List[List[bytes]]) -> Tuple[int, Optional[bytes]]:
+        tried = 0
+        if len(positions) > 1:
+            rest = positions[1:]
+            for symbol in positions[0]:
+                count, hit = self._walk(zipcrypto_update(symbol, state), prefix + symbol, rest)
+                tried += count
+                if hit is not None:
+                    return tried, hit
+            return tried, None
+        
+        # Last level, key update inlined: this loop runs once per candidate
+        headers = self.prefilter.headers
+        match = zipcrypto_headers_match
+        crc_table = CRC_TABLE
+        s0, s1, s2 = state
+        for symbol in positions[0]:
+            tried += 1
+            k0, k1, k2 = s0, s1, s2
+            for c in symbol:
+                k0 = (k0 >> 8) ^ crc_table[(k0 ^ c) & 0xFF]
+                k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+                k2 = (k2 >> 8) ^ crc_table[(k2 ^ (k1 >> 24)) & 0xFF]
+            if match((k0, k1, k2), headers) and self._check_member(prefix + symbol):
+                return tried, prefix + symbol
+        return tried, None
+    
+    def enable_timing(self):
+        """
+        Add the time spent in full verification (what passes the cheap checks:
+        decompression and CRC, or the AES HMAC) to verify_seconds from now on.
+        Wraps the stage per instance, so untimed verifiers pay nothing.
+        """
+        def timed(stage):
+            def wrapper(*args):
+                started = time.perf_counter()
+                try:
+                    return stage(*args)
+                finally:
+                    self.verify_seconds += time.perf_counter() - started
+            return wrapper
+        
+        if self.aes is not None:
+            self.aes._authenticate = timed(self.aes._authenticate)
+        else:
+            self._check_member = timed(self._check_member)
+    
+    def _check_member(self, password: bytes) -> bool:
+        """Full decryption of the member, no pre-filter"""
+        return self._decrypts(self.member, password) and self._confirm(password)
+    
+    def _decrypts(self, info: zipfile.ZipInfo, password: bytes) -> bool:
+        try:
+            # open() rejects on the header check byte before any decompression,
+            # reading to EOF runs the CRC check
+            with self._zip.open(info, pwd=password) as member:
+                while member.read(1 << 16):
+                    pass
+            return True
+        except (RuntimeError, zipfile.BadZipFile):
+            # Wrong password
+            return False
+        except Exception:
+            # Garbage out of the decompressor, also a wrong password
+            return False
+    
+    def _confirm(self, password: bytes) -> bool:
+        """The rest of the archive, only for the rare password that passed the member"""
+        for info in self._others:
+            if info.compress_type == AES_COMPRESS_TYPE:
+                member = self._other_aes.get(info.filename)
+                if member is None:
+                    member = self._other_aes[info.filename] = WinZipAESMember(self.zip_path, info)
+                valid = member.check(password)
+            else:
+                valid = self._decrypts(info, password)
+            if not valid:
+                self.false_positives.append(password)
+                return False
+        return True
+    
+    def check_batch(self, passwords: List[bytes]) -> Optional[bytes]:
+        """First password in the batch that verifies, None if none does"""
+        if not self.vectorized:
+            for password in passwords:
+                if self.check(password):
+                    return password
+            return None
+        
+        # The NumPy path needs same-length rows
+        by_length = {}
+        for i, password in enumerate(passwords):
+            by_length.setdefault(len(password), []).append(i)
+        
+        survivors = []
+        for indices in by_length.values():
+            group = [passwords[i] for i in indices]
+            survivors.extend(indices[j] for j in zipcrypto_filter_numpy(group, self.prefilter.headers))
+        
+        for i in sorted(survivors):
+            if self._check_member(passwords[i]):
+                return passwords[i]
+        return None
+    
+    def extract(self, password: bytes, path: str):
+        """Extract the whole archive with a confirmed password"""
+        for info in self._zip.infolist():
+            if info.compress_type != AES_COMPRESS_TYPE:
+                self._zip.extract(info, path=path, pwd=password)
+                continue
+            
+            # zipfile cannot decrypt WinZip AES, stream it ourselves
+            target_path = _extract_target_path(path, info.filename)
+            if info.is_dir():
+                os.makedirs(target_path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+            with open(target_path, 'wb') as target:
+                WinZipAESMember(self.zip_path, info).extract_to(password, target)
+    
+    def close(self):
+        self._zip.close()
+
+class MultiTargetVerifier:
+    """
+    Batch-mode verifier: every candidate is tried on each archive that is not
+    cracked yet. cracked is a flag per archive shared by all workers (a list,
+    or a shared Array for processes). Finds go to result_queue as per-archive
+    CrackResults and done_event is set once every archive is cracked; it never
+    returns a hit itself, so workers keep going for the remaining archives.
+    """
+    
+    def __init__(self, paths: List[str], prefilters: List[Optional[ZipCryptoPrefilter]],
+                 vectorized: bool, cracked, result_queue, done_event, worker_id: int = 0):
+        self.paths = paths
+        self.cracked = cracked
+        self.result_queue = result_queue
+        self.done_event = done_event
+        self.worker_id = worker_id
+        self.verifiers = []
+        try:
+            for path, prefilter in zip(paths, prefilters):
+                self.verifiers.append(ZipVerifier(path, prefilter, vectorized))
+        except Exception:
+            self.close()
+            raise
+        self.vectorized = any(verifier.vectorized for verifier in self.verifiers)
+    
+    @property
+    def incremental(self) -> bool:
+        # check_group() hands groups to each archive's verifier, which falls back as needed
+        return not self.vectorized
+    
+    def _remaining(self) -> List[Tuple[int, ZipVerifier]]:
+        return [(i, verifier) for i, verifier in enumerate(self.verifiers) if not self.cracked[i]]
+    
+    def _found(self, i: int, password: bytes):
+        if self.cracked[i]:
+            return
+        self.cracked[i] = 1
+        self.result_queue.put(CrackResult(
+            success=True,
+            password=decode_password(password),
+            password_bytes=password,
+            thread_id=self.worker_id,
+            archive=self.paths[i]
+        ))
+        if all(self.cracked):
+            self.done_event.set()
+    
+    def check(self, password: bytes) -> bool:
+        for i, verifier in self._remaining():
+            if verifier.check(password):
+                self._found(i, password)
+        return False
+    
+    def check_batch(self, passwords: List[bytes]) -> Optional[bytes]:
+        for i, verifier in self._remaining():
+            hit = verifier.check_batch(passwords)
+            if hit is not None:
+                self._found(i, hit)
+        return None
+    
+    def check_group(self, prefix: bytes, positions: List[List[bytes]]) -> Tuple[int, Optional[bytes]]:
+        for i, verifier in self._remaining():
+            _, hit = verifier.check_group(prefix, positions)
+            if hit is not None:
+                self._found(i, hit)
+        size = 1
+        for symbols in positions:
+            size *= len(symbols)
+        return size, None
+    
+    @property
+    def verify_seconds(self) -> float:
+        return sum(verifier.verify_seconds for verifier in self.verifiers)
+    
+    def enable_timing(self):
+        for verifier in self.verifiers:
+            verifier.enable_timing()
+    
+    def close(self):
+        for verifier in self.verifiers:
+            verifier.close()
+
+def open_verifier(paths: List[str], prefilters: List[Optional[ZipCryptoPrefilter]], vectorized: bool,
+                  cracked=None, result_queue=None, done_event=None, worker_id: int = 0):
+    """ZipVerifier for one archive, MultiTargetVerifier for a batch"""
+    if len(paths) == 1:
+        return ZipVerifier(paths[0], prefilters[0], vectorized)
+    return MultiTargetVerifier(paths, prefilters, vectorized, cracked, result_queue, done_event, worker_id)
+
+def archive_fingerprint(zip_path: str) -> str:
+    """
+    Stable identity of an archive: its size plus every central directory
+    entry and, for encrypted entries, the random bytes the encryption adds
+    (ZipCrypto header, or AES salt and password verifier). Two archives made
+    from the same files with different passwords differ in those.
+    """
+    digest = hashlib.sha256()
+    digest.update(str(os.path.getsize(zip_path)).encode())
+    with zipfile.ZipFile(zip_path) as zf, open(zip_path, 'rb') as f:
+        for info in zf.infolist():
+            entry = (f"{info.filename}|{info.CRC}|{info.compress_size}|{info.file_size}|"
+                     f"{info.header_offset}|{info.flag_bits}\n")
+            digest.update(entry.encode('utf-8', errors='surrogateescape'))
+            if not info.flag_bits & 0x1:
+                continue
+            
+            if info.compress_type == AES_COMPRESS_TYPE:
+                parsed = parse_aes_extra(info.extra)
+                length = AES_KEY_LENGTHS[parsed[1]] // 2 + 2 if parsed is not None else 0
+            else:
+                length = 12
+            f.seek(info.header_offset)
+            fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            if fields[0] != _LOCAL_HEADER_MAGIC:
+                raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+            f.seek(fields[10] + fields[11], 1)
+            digest.update(f.read(length))
+    return digest.hexdigest()
+
+@dataclass
+class Session:
+    """
+    Checkpoint of a long run, saved as JSON.
+    position is the wordlist byte offset or keyspace index before which
+    every candidate has been tried.
+    """
+    path: str
+    fingerprint: str
+    mode: str
+    attack: dict
+    position: int = 0
+    attempts: int = 0
+    elapsed: float = 0.0
+    found: dict = field(default_factory=dict)
+    
+    VERSION = 1
+    
+    @classmethod
+    def load(cls, path: str) -> 'Session':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No session to restore: {path}")
+        except ValueError as e:
+            raise ValueError(f"Corrupt session file {path}: {e}")
+        
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported session version: {data.get('version')}")
+        
+        return cls(
+            path=path,
+            fingerprint=data["fingerprint"],
+            mode=data["mode"],
+            attack=data["attack"],
+            position=data["position"],
+            attempts=data["attempts"],
+            elapsed=data["elapsed"],
+            found=data.get("found", {}),
+        )
+    
+    def save(self):
+        """Write to a temp file and rename over the old one, so a crash never leaves half a file"""
+        data = {
+            "version": self.VERSION,
+            "fingerprint": self.fingerprint,
+            "mode": self.mode,
+            "attack": self.attack,
+            "position": self.position,
+            "attempts": self.attempts,
+            "elapsed": self.elapsed,
+            "found": self.found,
+            "updated": time.time(),
         }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+class Potfile:
+    """
+    Cracked passwords by archive fingerprint, one "fingerprint:password" line
+    each, appended as they are found. Passwords that are not printable UTF-8
+    (or contain a newline) are written as $HEX[...], like hashcat does.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    @staticmethod
+    def _encode(password: bytes) -> str:
+        try:
+            text = password.decode('utf-8')
+            if text.isprintable() and not text.startswith("$HEX["):
+                return text
+        except UnicodeDecodeError:
+            pass
+        return f"$HEX[{password.hex()}]"
+    
+    @staticmethod
+    def _decode(text: str) -> bytes:
+        if text.startswith("$HEX[") and text.endswith("]"):
+            return bytes.fromhex(text[5:-1])
+        return text.encode('utf-8')
+    
+    def lookup(self, fingerprint: str) -> List[bytes]:
+        """Every password recorded for fingerprint, newest first"""
+        found = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    key, sep, password = line.rstrip("\n").partition(":")
+                    if sep and key == fingerprint:
+                        try:
+                            found.append(self._decode(password))
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            pass
+        return found[::-1]
+    
+    def add(self, fingerprint: str, password: bytes):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"{fingerprint}:{self._encode(password)}\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+class BloomFilter(_MappedFile):
+    """
+    Persistent Bloom filter over the candidates already tried against one
+    archive, kept in a memory-mapped file. Worker processes map the same file,
+    so their marks are shared and survive the run. A false positive skips an
+    untried candidate, so size it generously: false_positive_rate() tells.
+    """
+    
+    MAGIC = b"PWBLOOM1"
+    HEADER = struct.Struct("<8sIIQ32s")
+    HEADER_SIZE = 64
+    
+    _writable = True
+    
+    def __init__(self, path: str, fingerprint: str, memory_bytes: int = 64 << 20,
+                 expected_items: int = 10000000):
+        self.path = path
+        self.fingerprint = fingerprint
         
-        # Get charset
-        if charset in charsets:
-            chars = charsets[charset]
+        # An existing filter for this archive keeps its geometry, anything else is replaced
+        self.bits, self.hashes = self._read_header()
+        if self.bits is None:
+            self.bits = max(64, memory_bytes * 8)
+            self.hashes = max(1, min(16, round(self.bits / max(1, expected_items) * math.log(2))))
+            self._create()
+        self.expected_items = expected_items
+    
+    def _read_header(self) -> Tuple[Optional[int], Optional[int]]:
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(self.HEADER.size)
+        except FileNotFoundError:
+            return None, None
+        if len(header) != self.HEADER.size:
+            return None, None
+        magic, hashes, _, bits, fingerprint = self.HEADER.unpack(header)
+        if (magic != self.MAGIC or fingerprint != bytes.fromhex(self.fingerprint)
+                or os.path.getsize(self.path) != self.HEADER_SIZE + (bits + 7) // 8):
+            return None, None
+        return bits, hashes
+    
+    def _create(self):
+        header = self.HEADER.pack(self.MAGIC, self.hashes, 0, self.bits, bytes.fromhex(self.fingerprint))
+        with open(self.path, 'wb') as f:
+            f.write(header.ljust(self.HEADER_SIZE, b"\0"))
+            f.truncate(self.HEADER_SIZE + (self.bits + 7) // 8)
+    
+    def _positions(self, candidate: bytes) -> List[int]:
+        digest = hashlib.blake2b(candidate, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+    
+    def __contains__(self, candidate: bytes) -> bool:
+        mapping = self._mapping()
+        base = self.HEADER_SIZE
+        return all(mapping[base + (bit >> 3)] & (1 << (bit & 7)) for bit in self._positions(candidate))
+    
+    def update(self, candidates):
+        # Threads may race on a byte and lose a mark; that only means a retry later
+        mapping = self._mapping()
+        base = self.HEADER_SIZE
+        for candidate in candidates:
+            for bit in self._positions(candidate):
+                mapping[base + (bit >> 3)] |= 1 << (bit & 7)
+    
+    def false_positive_rate(self, items: Optional[int] = None) -> float:
+        """Expected rate once items (default: expected_items) are in the filter"""
+        items = self.expected_items if items is None else items
+        return (1 - math.exp(-self.hashes * items / self.bits)) ** self.hashes
+
+class DedupSource:
+    """
+    A candidate source seen through a BloomFilter: candidates already tried
+    against the archive (or repeated inside the range) are skipped. A range is
+    only marked once commit() says it was tried to the end without a hit, so
+    an interrupted unit is never recorded as done.
+    """
+    
+    def __init__(self, source, bloom: BloomFilter):
+        self.source = source
+        self.bloom = bloom
+        self.size = source.size
+        self._fresh = {}
+    
+    def ranges(self, candidates_per_range: int, start: int = 0) -> Generator[Tuple[int, int], None, None]:
+        return self.source.ranges(candidates_per_range, start)
+    
+    def iter_range(self, start: int, end: int) -> Generator[bytes, None, None]:
+        bloom = self.bloom
+        seen = set()
+        self._fresh[start] = seen
+        for candidate in self.source.iter_range(start, end):
+            if candidate not in seen and candidate not in bloom:
+                seen.add(candidate)
+                yield candidate
+    
+    def commit(self, start: int):
+        self.bloom.update(self._fresh.pop(start, ()))
+    
+    def discard(self, start: int):
+        """Forget a range that ended early, on a hit"""
+        self._fresh.pop(start, None)
+    
+    def close(self):
+        self.bloom.close()
+        self.source.close()
+
+class WorkTracker:
+    """
+    Tracks work units handed to workers and the ones they finished.
+    position is where a resumed run has to start: every unit before it is done.
+    """
+    
+    def __init__(self, position: int = 0):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._issued_end = position
+        self.start = position
+        self.done = position
+    
+    def issue(self, start: int, end: int):
+        with self._lock:
+            self._pending[start] = end
+            self._issued_end = end
+    
+    def finish(self, start: int):
+        with self._lock:
+            end = self._pending.pop(start, None)
+            if end is not None:
+                self.done += end - start
+    
+    @property
+    def position(self) -> int:
+        with self._lock:
+            return min(self._pending) if self._pending else self._issued_end
+
+# Per-worker stage timings, seconds: stage_seconds[worker slot * len(METRIC_STAGES) + stage]
+METRIC_STAGES = ("generate", "queue_wait", "prefilter", "verify")
+_STAGE_GENERATE, _STAGE_QUEUE_WAIT, _STAGE_PREFILTER, _STAGE_VERIFY = range(len(METRIC_STAGES))
+
+def _report_false_positives(verifier, result_queue, worker_id: int):
+    """Passwords the verifiers rejected on the rest of the archive, for the main loop to log"""
+    for member in getattr(verifier, "verifiers", [verifier]):
+        while member.false_positives:
+            password = member.false_positives.pop(0)
+            result_queue.put(CrackResult(
+                success=False,
+                password=decode_password(password),
+                password_bytes=password,
+                thread_id=worker_id,
+                error="False positive",
+                archive=member.zip_path
+            ))
+
+def _try_range(verifier: ZipVerifier, source, start: int, end: int,
+               stage_seconds=None, base: int = 0) -> Tuple[int, Optional[bytes]]:
+    """
+    Try every candidate in [start, end) of source, returns (attempts, password or None).
+    With stage_seconds the range is timed per stage into the worker's slots at base.
+    """
+    if stage_seconds is None:
+        tried, hit = _scan_range(verifier, source, start, end)
+    else:
+        tried, hit = _timed_scan_range(verifier, source, start, end, stage_seconds, base)
+    # Dedup filters only learn about ranges that were tried to the end
+    if isinstance(source, DedupSource):
+        if hit is None:
+            source.commit(start)
         else:
-            chars = charset  # Assume custom charset
+            source.discard(start)
+    return tried, hit
+
+def _scan_range(verifier: ZipVerifier, source, start: int, end: int) -> Tuple[int, Optional[bytes]]:
+    if verifier.vectorized:
+        passwords = list(source.iter_range(start, end))
+        return len(passwords), verifier.check_batch(passwords)
+    
+    # Sources that group candidates by a shared prefix let the verifier reuse its key state
+    if verifier.incremental and hasattr(source, "iter_groups"):
+        tried = 0
+        for prefix, positions in source.iter_groups(start, end):
+            count, hit = verifier.check_group(prefix, positions)
+            tried += count
+            if hit is not None:
+                return tried, hit
+        return tried, None
+    
+    # Tight loop: no locks, events or clocks per candidate
+    check = verifier.check
+    tried = 0
+    for password in source.iter_range(start, end):
+        tried += 1
+        if check(password):
+            return tried, password
+    return tried, None
+
+def _timed_scan_range(verifier: ZipVerifier, source, start: int, end: int,
+                      stage_seconds, base: int) -> Tuple[int, Optional[bytes]]:
+    """
+    _scan_range for metrics runs: the range is generated in full first so
+    candidate generation and checking are timed apart. Pre-filter time is
+    checking minus what the verifier spent in full verification.
+    """
+    perf_counter = time.perf_counter
+    verify_before = verifier.verify_seconds
+    began = perf_counter()
+    grouped = not verifier.vectorized and verifier.incremental and hasattr(source, "iter_groups")
+    items = list(source.iter_groups(start, end) if grouped else source.iter_range(start, end))
+    generated = perf_counter()
+    
+    tried, hit = 0, None
+    if verifier.vectorized:
+        tried, hit = len(items), verifier.check_batch(items)
+    elif grouped:
+        for prefix, positions in items:
+            count, hit = verifier.check_group(prefix, positions)
+            tried += count
+            if hit is not None:
+                break
+    else:
+        check = verifier.check
+        for password in items:
+            tried += 1
+            if check(password):
+                hit = password
+                break
+    
+    verify = verifier.verify_seconds - verify_before
+    stage_seconds[base + _STAGE_GENERATE] += generated - began
+    stage_seconds[base + _STAGE_PREFILTER] += perf_counter() - generated - verify
+    stage_seconds[base + _STAGE_VERIFY] += verify
+    return tried, hit
+
+def _ignore_interrupts():
+    """Worker processes leave Ctrl+C to the parent, which stops them through its events"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _process_worker(worker_id: int, paths: List[str], prefilters: List[Optional[ZipCryptoPrefilter]],
+                    vectorized: bool, source, unit_queue, result_queue, done_queue,
+                    found_event, worker_attempts, cracked, stage_seconds=None):
+    """Worker process that tries [start, end) ranges of the candidate source from the queue"""
+    _ignore_interrupts()
+    attempts = 0
+    start_time = time.time()
+    
+    try:
+        verifier = open_verifier(paths, prefilters, vectorized, cracked, result_queue, found_event, worker_id)
+    except Exception as e:
+        result_queue.put(CrackResult(
+            success=False,
+            thread_id=worker_id,
+            error=f"Cannot open zip: {e}"
+        ))
+        return
+    
+    slot = worker_id - 1
+    base = slot * len(METRIC_STAGES)
+    if stage_seconds is not None:
+        verifier.enable_timing()
+    try:
+        waiting = time.perf_counter()
+        while not found_event.is_set():
+            try:
+                unit = unit_queue.get(timeout=0.1)
+            except queue.Empty:
+                # Nobody is left to feed the queue or read the results
+                if not multiprocessing.parent_process().is_alive():
+                    break
+                continue
+            
+            # None means the producer is exhausted
+            if unit is None:
+                break
+            if stage_seconds is not None:
+                stage_seconds[base + _STAGE_QUEUE_WAIT] += time.perf_counter() - waiting
+            
+            # Ranges are expanded here, not in the producer
+            start, end = unit
+            try:
+                tried, hit = _try_range(verifier, source, start, end, stage_seconds, base)
+            except Exception as e:
+                # The unit stays unfinished, so a restore starts over at it
+                result_queue.put(CrackResult(
+                    success=False,
+                    thread_id=worker_id,
+                    error=f"Range {start:,}-{end:,} failed: {e}"
+                ))
+                break
+            _report_false_positives(verifier, result_queue, worker_id)
+            
+            # Only this process writes its slot, no lock needed
+            attempts += tried
+            worker_attempts[slot] = attempts
+            
+            if hit is not None:
+                # SUCCESS! Tell every other process to stop
+                found_event.set()
+                result_queue.put(CrackResult(
+                    success=True,
+                    password=decode_password(hit),
+                    password_bytes=hit,
+                    attempts=attempts,
+                    thread_id=worker_id,
+                    time_elapsed=time.time() - start_time
+                ))
+                break
+            
+            done_queue.put(start)
+            if stage_seconds is not None:
+                waiting = time.perf_counter()
+    finally:
+        verifier.close()
+        source.close()
+
+def _calibration_trial(paths: List[str], prefilters: List[Optional[ZipCryptoPrefilter]], vectorized: bool,
+                       source, start: int, buffer_size: int, index: int, stride: int,
+                       duration: float) -> Tuple[int, int, float]:
+    """
+    One calibration worker: try every stride-th range of source from index
+    for about duration seconds. Finds are thrown away, the real run tries the
+    slice again. Returns (attempts, positions covered, seconds).
+    """
+    verifier = open_verifier(paths, prefilters, vectorized, [0] * len(paths), queue.Queue(), threading.Event())
+    attempts = positions = 0
+    began = time.perf_counter()
+    try:
+        for lo, hi in itertools.islice(source.ranges(buffer_size, start), index, None, stride):
+            tried, _ = _scan_range(verifier, source, lo, hi)
+            attempts += tried
+            positions += hi - lo
+            if time.perf_counter() - began >= duration:
+                break
+    finally:
+        verifier.close()
+    return attempts, positions, time.perf_counter() - began
+
+# How long a process trial may take beyond its duration before calibration gives up
+_CALIBRATION_GRACE = 30.0
+
+def _calibration_process(args: tuple, result_queue):
+    """_calibration_trial in a worker process, reports (0, 0, 0.0) if it cannot run"""
+    _ignore_interrupts()
+    try:
+        result_queue.put(_calibration_trial(*args))
+    except Exception:
+        result_queue.put((0, 0, 0.0))
+    finally:
+        args[3].close()
+
+# Executors shared by every crack_async() job, one per backend
+_EXECUTORS = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+def shared_executor(backend: Backend = Backend.THREAD,
+                    workers: Optional[int] = None) -> concurrent.futures.Executor:
+    """
+    The process-wide executor for backend, created on first use with workers
+    (default: CPU count). crack_async() jobs queue their work units on it, so
+    any number of jobs share one pool instead of starting their own workers.
+    """
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(backend)
+        if executor is None:
+            workers = workers or os.cpu_count() or 1
+            if backend == Backend.PROCESS:
+                executor = concurrent.futures.ProcessPoolExecutor(workers, multiprocessing.get_context(),
+                                                               initializer=_ignore_interrupts)
+            else:
+                executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="pwcrack")
+            _EXECUTORS[backend] = executor
+        return executor
+
+def shutdown_executors(wait: bool = True):
+    """Stop the shared executors, the next crack_async() creates new ones"""
+    with _EXECUTORS_LOCK:
+        executors = list(_EXECUTORS.values())
+        _EXECUTORS.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+# Verifiers and sources stay open per executor thread (or process), a few jobs at a time
+_executor_local = threading.local()
+_EXECUTOR_VERIFIERS = 16
+_EXECUTOR_SOURCES = 4
+
+class _PickledSource:
+    """
+    A crack_async() source for the process executor: pickled to a file once
+    per job, then loaded once per worker process instead of being pickled
+    with every work unit.
+    """
+    
+    def __init__(self, source):
+        fd, self.path = tempfile.mkstemp(prefix=".pwsource-")
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(source, f, pickle.HIGHEST_PROTOCOL)
+    
+    def load(self):
+        sources = getattr(_executor_local, "sources", None)
+        if sources is None:
+            sources = _executor_local.sources = {}
+        source = sources.get(self.path)
+        if source is None:
+            if len(sources) >= _EXECUTOR_SOURCES:
+                sources.pop(next(iter(sources))).close()
+            with open(self.path, 'rb') as f:
+                source = sources[self.path] = pickle.load(f)
+        return source
+    
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def _executor_verifier(paths: List[str], prefilters: List[Optional[ZipCryptoPrefilter]], vectorized: bool):
+    """This executor thread's verifier for paths, opened on first use"""
+    verifiers = getattr(_executor_local, "verifiers", None)
+    if verifiers is None:
+        verifiers = _executor_local.verifiers = {}
+    key = (tuple(paths), vectorized)
+    verifier = verifiers.get(key)
+    if verifier is None:
+        if len(verifiers) >= _EXECUTOR_VERIFIERS:
+            verifiers.pop(next(iter(verifiers))).close()
+        verifier = verifiers[key] = open_verifier(paths, prefilters, vectorized, [], queue.Queue(),
+                                                  threading.Event())
+    return verifier
+
+def _executor_unit(paths: List[str], prefilters: List[Optional[ZipCryptoPrefilter]], vectorized: bool,
+                   source, cracked: List[int], start: int, end: int) -> Tuple[int, List[Tuple[str, bytes]]]:
+    """
+    Executor task of crack_async(): try [start, end) of source on every
+    archive in paths not flagged in cracked, generating each candidate once.
+    Returns (attempts, [(archive, password)]).
+    """
+    if isinstance(source, _PickledSource):
+        source = source.load()
+    verifier = _executor_verifier(paths, prefilters, vectorized)
+    
+    hits = []
+    if isinstance(verifier, MultiTargetVerifier):
+        # Finds of this unit only, the job keeps track of the whole run
+        verifier.cracked = list(cracked)
+        tried, _ = _scan_range(verifier, source, start, end)
+        while not verifier.result_queue.empty():
+            result = verifier.result_queue.get_nowait()
+            hits.append((result.archive, result.password_bytes))
+    else:
+        tried, hit = _scan_range(verifier, source, start, end)
+        if hit is not None:
+            hits.append((paths[0], hit))
+    
+    # Dedup filters only learn about ranges that were tried to the end
+    if isinstance(source, DedupSource):
+        if hits:
+            source.discard(start)
+        else:
+            source.commit(start)
+    return tried, hits
+
+class CrackJob:
+    """
+    A crack_async() run on the shared executors. Await it for the
+    CrackResult, iterate progress() for snapshots, cancel() to stop
+    cooperatively: no new work units are handed out and the ones in flight
+    finish, then the job returns an unsuccessful result with error
+    "Cancelled" (snapshot()["resume_position"] says where to start again).
+    """
+    
+    def __init__(self, cracker: 'ThreadedZipCracker'):
+        self.cracker = cracker
+        self.task = None
+        self.in_flight = {}
+        self.cancelled = threading.Event()
+    
+    def __await__(self):
+        return self.task.__await__()
+    
+    def done(self) -> bool:
+        return self.task.done()
+    
+    def cancel(self):
+        """Safe from any thread"""
+        self.cancelled.set()
+        self.cracker.stop()
+    
+    def snapshot(self) -> dict:
+        snapshot = self.cracker.snapshot()
+        snapshot["queue_depth"] = len(self.in_flight)
+        return snapshot
+    
+    async def progress(self, interval: float = 1.0) -> AsyncIterator[dict]:
+        """A snapshot every interval seconds while the job runs, then a last one"""
+        while not self.task.done():
+            yield self.snapshot()
+            await asyncio.wait({self.task}, timeout=interval)
+        yield self.snapshot()
+
+# Distributed mode: one coordinator leases index ranges to remote workers
+CLUSTER_PORT = 7878
+CLUSTER_PROTOCOL = 1
+# Reconnects after losing the coordinator before a worker gives up
+CLUSTER_RETRIES = 3
+
+def parse_address(address: str, default_host: str = "127.0.0.1") -> Tuple[str, int]:
+    """"host:port", ":port", "host" or "port" to (host, port)"""
+    host, sep, port = address.rpartition(":")
+    if not sep:
+        host, port = (default_host, address) if address.isdigit() else (address, "")
+    return host or default_host, int(port) if port else CLUSTER_PORT
+
+class LeaseTable:
+    """
+    Index ranges leased to cluster workers. A lease lives until its deadline,
+    which every heartbeat pushes back; expired leases are handed out again
+    before any fresh range. Finished ranges are reported to the WorkTracker.
+    """
+    
+    def __init__(self, units: Generator, tracker: WorkTracker, timeout: float):
+        self._units = units
+        self._tracker = tracker
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._active = {}
+        self._expired = []
+        self._drained = False
+    
+    def lease(self) -> Optional[Tuple[int, int]]:
+        """Next range to work on, None if there is nothing to hand out right now"""
+        with self._lock:
+            now = time.time()
+            for start, (end, deadline) in list(self._active.items()):
+                if deadline < now:
+                    del self._active[start]
+                    self._expired.append((start, end))
+            
+            if self._expired:
+                start, end = self._expired.pop(0)
+            else:
+                try:
+                    start, end = next(self._units)
+                except StopIteration:
+                    self._drained = True
+                    return None
+                self._tracker.issue(start, end)
+            
+            self._active[start] = (end, now + self._timeout)
+            return start, end
+    
+    def renew(self, start: int):
+        with self._lock:
+            if start in self._active:
+                self._active[start] = (self._active[start][0], time.time() + self._timeout)
+    
+    def complete(self, start: int):
+        with self._lock:
+            self._active.pop(start, None)
+            self._expired = [lease for lease in self._expired if lease[0] != start]
+            self._tracker.finish(start)
+    
+    @property
+    def finished(self) -> bool:
+        """Every range was handed out and reported done"""
+        with self._lock:
+            return self._drained and not self._active and not self._expired
+    
+    @property
+    def leased(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+class ClusterCoordinator:
+    """
+    Coordinator side of the cluster protocol: one JSON object per line, each
+    worker message gets one reply. Workers say hello, then ask for leases and
+    report progress, completion or a found password.
+    """
+    
+    def __init__(self, verifier: ZipVerifier, fingerprint: str, mode: AttackMode, spec: dict,
+                 leases: LeaseTable, chunk_size: int):
+        self.verifier = verifier
+        self.fingerprint = fingerprint
+        self.mode = mode
+        self.spec = spec
+        self.leases = leases
+        self.chunk_size = chunk_size
+        self.password = None
+        self.found_by = None
+        self.workers = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def attempts(self) -> int:
+        with self._lock:
+            return sum(self.workers.values())
+    
+    def _stop_reply(self) -> Optional[dict]:
+        if self.password is not None:
+            return {"type": "stop", "reason": "found"}
+        if self.leases.finished:
+            return {"type": "stop", "reason": "exhausted"}
+        return None
+    
+    def handle(self, worker: str, message: dict) -> dict:
+        kind = message.get("type")
+        with self._lock:
+            self.workers[worker] = self.workers.get(worker, 0) + int(message.get("attempts", 0))
         
-        # Create generator
-        def brute_generator():
-            for i in range(1, length + 1):
-                for combo in itertools.product(chars, repeat=i):
-                    yield ''.join(combo)
+        if kind == "hello":
+            if message.get("protocol") != CLUSTER_PROTOCOL:
+                return {"type": "error", "error": "Protocol version mismatch"}
+            return {"type": "job", "fingerprint": self.fingerprint, "mode": self.mode.value,
+                    "spec": self.spec, "chunk_size": self.chunk_size}
         
-        self.generator = brute_generator()
-        return self.generator
+        if kind == "found":
+            # Confirm it here, a wrong report must not stop the cluster
+            password = bytes.fromhex(message["password"])
+            with self._lock:
+                if self.password is None and self.verifier.check(password):
+                    self.password = password
+                    self.found_by = worker
+            return self._stop_reply() or {"type": "ok"}
+        
+        if kind == "progress":
+            self.leases.renew(message["lease"])
+            return self._stop_reply() or {"type": "ok"}
+        
+        if kind == "done":
+            self.leases.complete(message["lease"])
+            return self._stop_reply() or {"type": "ok"}
+        
+        if kind == "lease":
+            stop = self._stop_reply()
+            if stop is not None:
+                return stop
+            lease = self.leases.lease()
+            if lease is None:
+                # Everything is out, wait for stragglers or expired leases
+                return self._stop_reply() or {"type": "wait", "retry": 1.0}
+            return {"type": "lease", "start": lease[0], "end": lease[1]}
+        
+        return {"type": "error", "error": f"Unknown message type: {kind}"}
+
+class _ClusterHandler(socketserver.StreamRequestHandler):
+    """One worker connection"""
+    
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker = f"{self.client_address[0]}:{self.client_address[1]}"
+        with self.server.lock:
+            self.server.connections += 1
+        try:
+            for line in self.rfile:
+                try:
+                    message = json.loads(line)
+                    worker = message.get("worker", worker)
+                    reply = coordinator.handle(worker, message)
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"type": "error", "error": f"Bad message: {e}"}
+                self.wfile.write(json.dumps(reply).encode() + b"\n")
+                if reply["type"] in ("stop", "error"):
+                    break
+        except OSError:
+            # Worker went away, its lease expires on its own
+            pass
+        finally:
+            with self.server.lock:
+                self.server.connections -= 1
+
+class _ClusterServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, address: Tuple[str, int], coordinator: ClusterCoordinator):
+        super().__init__(address, _ClusterHandler)
+        self.coordinator = coordinator
+        self.lock = threading.Lock()
+        self.connections = 0
+
+class _ClusterConnection:
+    """Worker side of the cluster protocol"""
+    
+    def __init__(self, address: Tuple[str, int], worker: str, timeout: float = 30.0):
+        self.worker = worker
+        self._socket = socket.create_connection(address, timeout=timeout)
+        self._file = self._socket.makefile('rwb')
+    
+    def request(self, kind: str, **fields) -> dict:
+        fields.update(type=kind, worker=self.worker)
+        self._file.write(json.dumps(fields).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Coordinator closed the connection")
+        reply = json.loads(line)
+        if reply["type"] == "error":
+            raise ValueError(f"Coordinator error: {reply.get('error')}")
+        return reply
+    
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+def _cluster_worker(worker_id: int, zip_path: str, address: Tuple[str, int],
+                    prefilter: Optional[ZipCryptoPrefilter], vectorized: bool, result_queue):
+    """
+    Worker loop: lease a range, try it in chunks with a heartbeat, repeat until told
+    to stop. A lost connection is retried CLUSTER_RETRIES times, the lease it held
+    expires on the coordinator and goes to another worker.
+    """
+    _ignore_interrupts()
+    start_time = time.time()
+    result = CrackResult(success=False)
+    connection = None
+    verifier = None
+    retries = 0
+    
+    try:
+        while True:
+            try:
+                connection = _ClusterConnection(address, f"{socket.gethostname()}:{os.getpid()}")
+                job = connection.request("hello", protocol=CLUSTER_PROTOCOL)
+                if job["type"] != "job":
+                    raise ValueError("Coordinator refused the worker")
+                if job["fingerprint"] != archive_fingerprint(zip_path):
+                    raise ValueError("Local archive differs from the coordinator's")
+                
+                source = keyspace_from_spec(AttackMode(job["mode"]), job["spec"])
+                chunk_size = max(1, job["chunk_size"])
+                if verifier is None:
+                    verifier = ZipVerifier(zip_path, prefilter, vectorized)
+                retries = 0
+                
+                _cluster_session(connection, verifier, source, chunk_size, result)
+                break
+            except OSError as e:
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                retries += 1
+                if retries > CLUSTER_RETRIES:
+                    raise
+                print(f"[!] Worker {worker_id}: coordinator unreachable ({e}), "
+                      f"retry {retries}/{CLUSTER_RETRIES}")
+                time.sleep(retries)
+    except (OSError, ValueError, KeyError) as e:
+        result.error = f"Cluster worker failed: {e}"
+    finally:
+        if verifier is not None:
+            verifier.close()
+        if connection is not None:
+            connection.close()
     
-    def estimate_combinations(self, length: int, charset: str = "MiniASCII") -> int:
-        """Estimate total combinations"""
-        charsets = {
-            "MiniASCII": string.ascii_lowercase + string.digits,
-            "lower": string.ascii_lowercase,
-            "upper": string.ascii_uppercase,
-            "letters": string.ascii_letters,
-            "alphanum": string.ascii_letters + string.digits,
-            "all": string.ascii_letters + string.digits + string.punctuation,
-        }
+    result.time_elapsed = time.time() - start_time
+    result.thread_id = worker_id
+    result_queue.put(result)
+
+def _cluster_session(connection: _ClusterConnection, verifier: ZipVerifier, source,
+                     chunk_size: int, result: CrackResult):
+    """Leases over one connection until the coordinator says stop, counting into result"""
+    while True:
+        reply = connection.request("lease")
+        if reply["type"] == "wait":
+            time.sleep(reply["retry"])
+            continue
+        if reply["type"] != "lease":
+            return
         
-        if charset in charsets:
-            chars = charsets[charset]
-        else:
-            chars = charset
+        lease_start, lease_end = reply["start"], reply["end"]
+        unreported = 0
+        last_beat = time.time()
+        lo = lease_start
+        while lo < lease_end:
+            hi = min(lo + chunk_size, lease_end)
+            tried, hit = _try_range(verifier, source, lo, hi)
+            result.attempts += tried
+            unreported += tried
+            
+            if hit is not None:
+                reply = connection.request("found", lease=lease_start, attempts=unreported,
+                                           password=hit.hex())
+                unreported = 0
+                if reply["type"] == "stop":
+                    if reply.get("reason") == "found":
+                        result.success = True
+                        result.password = decode_password(hit)
+                        result.password_bytes = hit
+                    return
+                
+                # The coordinator did not confirm it, go on after what was tried
+                lo += tried
+                continue
+            
+            # Heartbeat about once a second, keeps the lease and hears about stops
+            if time.time() - last_beat >= 1.0:
+                reply = connection.request("progress", lease=lease_start, attempts=unreported)
+                unreported = 0
+                last_beat = time.time()
+                if reply["type"] == "stop":
+                    return
+            lo = hi
         
-        char_count = len(chars)
-        return sum(char_count ** i for i in range(1, length + 1))
+        reply = connection.request("done", lease=lease_start, attempts=unreported)
+        if reply["type"] == "stop":
+            return
 
 class ThreadedZipCracker:
     """
@@ -101,29 +2889,88 @@ class ThreadedZipCracker:
         result = cracker.crack_wordlist("passwords.txt", threads=4)
         # or
         result = cracker.crack_bruteforce(4, charset="alphanum", threads=4)
+        # or, to use every core instead of being held back by the GIL
+        result = cracker.crack_bruteforce(4, threads=8, backend=Backend.PROCESS)
+        # ZipCrypto batches can be pre-filtered with NumPy (use a large buffer_size)
+        cracker = ThreadedZipCracker(zip_path, verifier=VerifierBackend.NUMPY)
+        # with a session file, an interrupted run continues where it stopped
+        cracker = ThreadedZipCracker(zip_path, session_path="archive.zip.session")
+        result = cracker.crack_bruteforce(7, charset="alphanum", restore=True)
     """
     
-    def __init__(self, zip_path: str, extract_path: str = ".", verbose: bool = True):
-        self.zip_path = zip_path
+    def __init__(self, zip_path: Union[str, List[str]], extract_path: str = ".", verbose: bool = True,
+                 session_path: Optional[str] = None, checkpoint_interval: float = 30.0,
+                 verifier: VerifierBackend = VerifierBackend.SCALAR,
+                 potfile_path: Optional[str] = None, metrics_path: Optional[str] = None,
+                 metrics_format: str = "jsonl", metrics_interval: float = 10.0, autotune: bool = False):
+        # One archive, or a batch that shares every candidate
+        self.targets = [zip_path] if isinstance(zip_path, str) else list(zip_path)
+        if not self.targets:
+            raise ValueError("No archives to crack")
+        self.zip_path = self.targets[0]
         self.extract_path = extract_path
         self.verbose = verbose
+        self.session_path = session_path
+        self.checkpoint_interval = checkpoint_interval
+        self.potfile = Potfile(potfile_path) if potfile_path else None
+        self.metrics = MetricsWriter(metrics_path, metrics_format, metrics_interval) if metrics_path else None
+        self.autotune = autotune
+        self.calibration = None
+        self._job = None
+        self._fingerprints = {}
         self.wordlist = Wordlist()
+        
+        # Encryption headers are read once here, per archive, and shared by every worker
+        self.prefilters = []
+        encryptions = []
+        for path in self.targets:
+            try:
+                self.prefilters.append(ZipCryptoPrefilter.from_zip(path))
+            except Exception:
+                # Let the workers report the unreadable archive
+                self.prefilters.append(None)
+            try:
+                encryptions.append(archive_encryption(path))
+            except Exception:
+                encryptions.append(None)
+        self.prefilter = self.prefilters[0]
+        self.encryption = "aes" if "aes" in encryptions else encryptions[0]
+        
+        # NumPy batches are optional, the scalar path always works
+        self.vectorized = verifier == VerifierBackend.NUMPY
+        if self.vectorized and np is None:
+            if verbose:
+                print("[!] NumPy is not installed, using the scalar verifier")
+            self.vectorized = False
         self._stop_event = threading.Event()
         self._found_event = threading.Event()
         self._result_queue = queue.Queue()
-        self._stats_lock = threading.Lock()
+        self._worker_attempts = []
+        self._worker_ids = None
+        self._stage_seconds = None
+        self._unit_queue = None
+        self._shared_stop = None
+        self._progress_total = 0
         self._total_attempts = 0
+        self._previous_attempts = 0
+        self._previous_elapsed = 0.0
         self._start_time = 0
-        
-    def _worker(self, thread_id: int, password_queue: queue.Queue, stats_interval: int = 1000):
-        """Worker thread that tries passwords from the queue"""
-        import zipfile
-        
+        self._last_report = 0
+        self._session = None
+        self._tracker = WorkTracker()
+        self._last_checkpoint = 0
+        self._finds = {}
+        self._cracked = [0] * len(self.targets)
+        self.results = {}
+    
+    def _worker(self, thread_id: int, unit_queue: queue.Queue, source):
+        """Worker thread that tries [start, end) ranges of the candidate source from the queue"""
         attempts = 0
-        last_report = time.time()
+        slot = thread_id - 1
         
         try:
-            zip_file = zipfile.ZipFile(self.zip_path)
+            verifier = open_verifier(self.targets, self.prefilters, self.vectorized, self._cracked,
+                                     self._result_queue, self._found_event, thread_id)
         except Exception as e:
             self._result_queue.put(CrackResult(
                 success=False,
@@ -132,133 +2979,903 @@ class ThreadedZipCracker:
             ))
             return
         
+        stage_seconds = self._stage_seconds
+        base = slot * len(METRIC_STAGES)
+        if stage_seconds is not None:
+            verifier.enable_timing()
+        waiting = time.perf_counter()
+        
         while not self._stop_event.is_set() and not self._found_event.is_set():
             try:
-                # Get password with timeout to check stop event
-                password = password_queue.get(timeout=0.1)
-                attempts += 1
-                
-                # Try password
-                try:
-                    zip_file.extractall(path=self.extract_path, pwd=password.encode('utf-8'))
-                    
-                    # SUCCESS!
-                    self._found_event.set()
-                    self._result_queue.put(CrackResult(
-                        success=True,
-                        password=password,
-                        attempts=attempts,
-                        thread_id=thread_id,
-                        time_elapsed=time.time() - self._start_time
-                    ))
-                    break
-                    
-                except (RuntimeError, zipfile.BadZipFile):
-                    # Wrong password
-                    pass
-                except Exception as e:
-                    # Other error
-                    if self.verbose:
-                        print(f"[Thread {thread_id}] Error: {e}")
-                
-                # Update stats
-                with self._stats_lock:
-                    self._total_attempts += 1
-                
-                # Periodic reporting
-                if self.verbose and time.time() - last_report > 1.0:  # Every second
-                    with self._stats_lock:
-                        elapsed = time.time() - self._start_time
-                        rate = self._total_attempts / elapsed if elapsed > 0 else 0
-                        print(f"[Thread {thread_id}] {self._total_attempts:,} total | {rate:.0f}/sec | Current: {password[:20]}...", end='\r')
-                    last_report = time.time()
-                    
+                # Get a unit with timeout to check stop event
+                unit = unit_queue.get(timeout=0.1)
             except queue.Empty:
                 # Queue empty, check if we should continue
                 continue
+            
+            # None means the producer is exhausted
+            if unit is None:
+                break
+            if stage_seconds is not None:
+                stage_seconds[base + _STAGE_QUEUE_WAIT] += time.perf_counter() - waiting
+            
+            start, end = unit
+            try:
+                tried, hit = _try_range(verifier, source, start, end, stage_seconds, base)
             except Exception as e:
-                if self.verbose:
-                    print(f"[Thread {thread_id}] Error: {e}")
-        
-        zip_file.close()
+                # The unit stays unfinished, so a restore starts over at it
+                self._result_queue.put(CrackResult(
+                    success=False,
+                    thread_id=thread_id,
+                    error=f"Range {start:,}-{end:,} failed: {e}"
+                ))
+                break
+            _report_false_positives(verifier, self._result_queue, thread_id)
+            
+            # Only this thread writes its slot, the aggregator sums them
+            attempts += tried
+            self._worker_attempts[slot] = attempts
+            
+            if hit is not None:
+                # SUCCESS!
+                self._found_event.set()
+                self._result_queue.put(CrackResult(
+                    success=True,
+                    password=decode_password(hit),
+                    password_bytes=hit,
+                    attempts=attempts,
+                    thread_id=thread_id,
+                    time_elapsed=time.time() - self._start_time
+                ))
+                break
+            
+            self._tracker.finish(start)
+            if stage_seconds is not None:
+                waiting = time.perf_counter()
         
-        if self.verbose and not self._found_event.is_set():
-            print(f"[Thread {thread_id}] Finished after {attempts:,} attempts")
+        verifier.close()
     
-    def _password_producer(self, generator: Generator, password_queue: queue.Queue, buffer_size: int = 1000):
-        """Produce passwords from generator to queue"""
-        buffer = []
+    def _unit_producer(self, units: Generator, unit_queue, workers: int, found_event):
+        """Feed work units to the workers, then one sentinel per worker"""
+        for unit in units:
+            if found_event.is_set() or self._stop_event.is_set():
+                break
+            
+            # Issued before it is queued, so an aborted put still counts as not done
+            self._tracker.issue(*unit)
+            self._put_unit(unit_queue, unit, found_event)
+        else:
+            # One sentinel per worker so every worker exits once the space is covered
+            for _ in range(workers):
+                self._put_unit(unit_queue, None, found_event)
+            return
         
-        for password in generator:
-            if self._found_event.is_set() or self._stop_event.is_set():
+        # Stopped early, sentinels are best effort so a full queue cannot block here
+        for _ in range(workers):
+            try:
+                unit_queue.put_nowait(None)
+            except queue.Full:
                 break
-                
-            buffer.append(password)
+    
+    def _put_unit(self, unit_queue, unit, found_event):
+        """Put a unit on the queue without blocking past a stop"""
+        while not found_event.is_set() and not self._stop_event.is_set():
+            try:
+                unit_queue.put(unit, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def archive_fingerprint(self, path: str) -> str:
+        if path not in self._fingerprints:
+            self._fingerprints[path] = archive_fingerprint(path)
+        return self._fingerprints[path]
+    
+    @property
+    def fingerprint(self) -> str:
+        """The archive's fingerprint, or one for the whole batch"""
+        if len(self.targets) == 1:
+            return self.archive_fingerprint(self.zip_path)
+        digest = hashlib.sha256()
+        for fingerprint in sorted(self.archive_fingerprint(path) for path in self.targets):
+            digest.update(fingerprint.encode())
+        return digest.hexdigest()
+    
+    def _check_potfile(self) -> Optional[CrackResult]:
+        """
+        Start a run: archives the potfile already has a password for count as
+        found. Returns the final result if that covers every archive.
+        """
+        self._finds = {}
+        self.results = {}
+        if self.potfile is None:
+            return None
+        
+        for path, prefilter in zip(self.targets, self.prefilters):
+            try:
+                candidates = self.potfile.lookup(self.archive_fingerprint(path))
+                if not candidates:
+                    continue
+                verifier = ZipVerifier(path, prefilter)
+            except Exception:
+                # An unreadable potfile or archive is for the attack itself to report
+                continue
             
-            # Fill buffer before putting to queue
-            if len(buffer) >= buffer_size:
-                for pwd in buffer:
-                    if self._found_event.is_set():
+            try:
+                for password in candidates:
+                    if verifier.check(password):
+                        if self.verbose:
+                            print(f"[*] Password for {os.path.basename(path)} found in potfile {self.potfile.path}")
+                        self._finds[path] = CrackResult(success=True, password=decode_password(password),
+                                                        password_bytes=password, source="potfile",
+                                                        archive=path)
                         break
-                    password_queue.put(pwd)
-                buffer.clear()
+            finally:
+                verifier.close()
         
-        # Put remaining passwords
-        for pwd in buffer:
-            if self._found_event.is_set():
-                break
-            password_queue.put(pwd)
+        if len(self._finds) == len(self.targets):
+            return self._settle_results(0, 0.0)
+        return None
+    
+    def _record_potfile(self, path: str, password: bytes):
+        if self.potfile is None:
+            return
+        try:
+            self.potfile.add(self.archive_fingerprint(path), password)
+        except OSError as e:
+            if self.verbose:
+                print(f"[!] Cannot write potfile {self.potfile.path}: {e}")
+    
+    def _false_positive(self, result: CrackResult) -> bool:
+        """Log a password that passed one member but not the archive, the run goes on"""
+        if result.success or result.password_bytes is None:
+            return False
+        if self.verbose:
+            print(f"\n[!] {os.path.basename(result.archive)}: {result.password!r} passed the member check "
+                  f"but not the rest of the archive, false positive")
+        return True
+    
+    def _record_find(self, result: CrackResult) -> bool:
+        """Keep a worker's find, True once every archive is cracked"""
+        path = result.archive or self.zip_path
+        result.archive = path
+        if path not in self._finds:
+            self._finds[path] = result
+            if self.verbose and len(self.targets) > 1:
+                print(f"\n[✓] {os.path.basename(path)}: {result.password}")
+        return len(self._finds) == len(self.targets)
     
-    def crack_wordlist(self, wordlist_path: str, threads: int = 4, buffer_size: int = 1000) -> CrackResult:
-        """Crack using wordlist with multiple threads"""
-        print(f"[*] Starting wordlist attack with {threads} threads")
+    def _begin_session(self, mode: AttackMode, attack: dict, restore: bool) -> int:
+        """Set up checkpointing, returns the position to start from"""
+        self._session = None
+        if not self.session_path:
+            if restore:
+                raise ValueError("Restore needs a session file")
+            return 0
+        
+        fingerprint = self.fingerprint
+        if restore:
+            session = Session.load(self.session_path)
+            if session.fingerprint != fingerprint:
+                raise ValueError("Session belongs to a different archive")
+            if session.mode != mode.value or session.attack != attack:
+                raise ValueError("Session was saved for a different attack")
+            if self.verbose:
+                print(f"[*] Restoring session at position {session.position:,} "
+                      f"({session.attempts:,} attempts done)")
+            
+            # Batch archives cracked before the interruption stay cracked,
+            # once the saved password still opens them
+            for path, prefilter in zip(self.targets, self.prefilters):
+                password = session.found.get(self.archive_fingerprint(path))
+                if password is None or path in self._finds:
+                    continue
+                password = bytes.fromhex(password)
+                try:
+                    verifier = ZipVerifier(path, prefilter)
+                    try:
+                        valid = verifier.check(password)
+                    finally:
+                        verifier.close()
+                except Exception:
+                    # An unreadable archive is for the attack itself to report
+                    continue
+                if valid:
+                    self._finds[path] = CrackResult(success=True, password=decode_password(password),
+                                                    password_bytes=password, archive=path)
+                elif self.verbose:
+                    print(f"[!] Saved password for {os.path.basename(path)} does not open it, cracking it again")
+        else:
+            session = Session(self.session_path, fingerprint, mode.value, attack)
+        
+        self._session = session
+        return session.position
+    
+    def _checkpoint(self, force: bool = False):
+        """Save the session if one is active and the interval has passed"""
+        if self._session is None:
+            return
+        now = time.time()
+        if not force and now - self._last_checkpoint < self.checkpoint_interval:
+            return
+        self._last_checkpoint = now
+        
+        self._session.position = self._tracker.position
+        self._session.found = {self.archive_fingerprint(path): result.password_bytes.hex()
+                               for path, result in self._finds.items()}
+        self._session.attempts = self._run_attempts
+        self._session.elapsed = self._run_elapsed
+        try:
+            self._session.save()
+        except OSError as e:
+            if self.verbose:
+                print(f"\n[!] Cannot save session: {e}")
+    
+    @property
+    def _run_attempts(self) -> int:
+        """Attempts including the ones from a restored session"""
+        return self._previous_attempts + self._total_attempts
+    
+    @property
+    def _run_elapsed(self) -> float:
+        return self._previous_elapsed + time.time() - self._start_time
+    
+    def crack_wordlist(self, wordlist_path: str, threads: int = 4, buffer_size: int = 1000,
+                       backend: Backend = Backend.THREAD, restore: bool = False,
+                       rules_path: Optional[str] = None, dedup_memory: Optional[int] = None,
+                       dedup_path: Optional[str] = None, min_length: Optional[int] = None,
+                       max_length: Optional[int] = None) -> CrackResult:
+        """
+        Crack using wordlist with multiple threads or processes, optionally mangled by a rule file.
+        min_length/max_length skip whole length buckets of a compiled wordlist.
+        """
+        cached = self._check_potfile()
+        if cached is not None:
+            return cached
+        
+        print(f"[*] Starting wordlist attack with {threads} {backend.value} workers")
         print(f"[*] Wordlist: {wordlist_path}")
         
-        # Create password generator
+        # Workers scan newline-aligned byte ranges of the mapped file (word indexes of a
+        # compiled one), resumable at an offset
+        wordlist = None
         try:
-            password_generator = self.wordlist.get_from_file_generator(wordlist_path)
+            # Rules first, a bad rule file must not leave the wordlist mapped
+            rules = RuleSet.from_file(rules_path) if rules_path else None
+            wordlist = open_wordlist(wordlist_path, min_length, max_length)
+            attack = {
+                "wordlist": os.path.abspath(wordlist_path),
+                "size": wordlist.size,
+            }
+            if isinstance(wordlist, CompiledWordlist):
+                attack["min_length"] = min_length
+                attack["max_length"] = max_length
+                lengths = wordlist.lengths
+                print(f"[*] Compiled: {wordlist.size:,} of {wordlist.total:,} words"
+                      + (f", lengths {lengths[0][0]}-{lengths[-1][0]}" if lengths else ""))
+            if rules is not None:
+                # Rules run per word inside the workers, positions stay byte offsets
+                print(f"[*] Rules: {rules_path} ({len(rules):,} rules)")
+                attack["rules"] = os.path.abspath(rules_path)
+                attack["rule_count"] = len(rules)
+                wordlist = RuledWordlist(wordlist, rules)
+            if dedup_memory:
+                wordlist = self._dedup_source(wordlist, dedup_memory, dedup_path)
+            start = self._begin_session(AttackMode.WORDLIST, attack, restore)
         except Exception as e:
+            if wordlist is not None:
+                wordlist.close()
             return CrackResult(success=False, error=str(e))
         
-        return self._crack_with_generator(password_generator, threads, buffer_size, AttackMode.WORDLIST)
+        try:
+            return self._crack_with_generator(wordlist.ranges(buffer_size, start), threads, buffer_size,
+                                              AttackMode.WORDLIST, backend, wordlist, start)
+        finally:
+            wordlist.close()
+    
+    def _dedup_source(self, wordlist, memory: int, path: Optional[str]) -> DedupSource:
+        """Wrap a wordlist source in the archive's persistent Bloom filter"""
+        # Rough candidate count, sizes the hash count of a new filter
+        inner = getattr(wordlist, "wordlist", wordlist)
+        expected = inner.size // inner.bytes_per_line * len(getattr(wordlist, "rules", [None]))
+        bloom = BloomFilter(path or self.zip_path + ".bloom", self.fingerprint, memory, max(1, expected))
+        print(f"[*] Dedup filter: {bloom.path} ({bloom.bits // 8 / (1 << 20):.1f} MB, {bloom.hashes} hashes, "
+              f"~{bloom.false_positive_rate():.2e} false positives at {expected:,} candidates)")
+        return DedupSource(wordlist, bloom)
     
-    def crack_bruteforce(self, max_length: int, charset: str = "MiniASCII", 
-                         threads: int = 4, buffer_size: int = 1000) -> CrackResult:
-        """Crack using brute force with multiple threads"""
-        print(f"[*] Starting brute force attack with {threads} threads")
+    def crack_bruteforce(self, max_length: int, charset: str = "MiniASCII",
+                         threads: int = 4, buffer_size: int = 1000,
+                         backend: Backend = Backend.THREAD, restore: bool = False) -> CrackResult:
+        """Crack using brute force with multiple threads or processes"""
+        cached = self._check_potfile()
+        if cached is not None:
+            return cached
+        
+        print(f"[*] Starting brute force attack with {threads} {backend.value} workers")
         print(f"[*] Max length: {max_length}, Charset: {charset}")
         
+        try:
+            keyspace = BruteForceKeyspace(max_length, charset)
+            start = self._begin_session(AttackMode.BRUTEFORCE, keyspace.spec, restore)
+        except Exception as e:
+            return CrackResult(success=False, error=str(e))
+        
         # Estimate combinations
-        estimated = self.wordlist.estimate_combinations(max_length, charset)
-        print(f"[*] Estimated combinations: {estimated:,}")
+        print(f"[*] Estimated combinations: {keyspace.size:,}")
+        
+        if keyspace.size > 1000000:
+            print("[!] WARNING: Over 1 million combinations!")
+        
+        # Workers take [start, end) ranges and expand them themselves
+        return self._crack_with_generator(keyspace.ranges(buffer_size, start), threads, buffer_size,
+                                          AttackMode.BRUTEFORCE, backend, keyspace, start)
+    
+    def crack_mask(self, mask: str, custom_charsets: Optional[List[Optional[str]]] = None,
+                   increment: bool = False, increment_min: Optional[int] = None,
+                   increment_max: Optional[int] = None, threads: int = 4, buffer_size: int = 1000,
+                   backend: Backend = Backend.THREAD, restore: bool = False) -> CrackResult:
+        """Crack using a hashcat-style mask with multiple threads or processes"""
+        cached = self._check_potfile()
+        if cached is not None:
+            return cached
+        
+        print(f"[*] Starting mask attack with {threads} {backend.value} workers")
+        print(f"[*] Mask: {mask}" + (" (increment)" if increment else ""))
+        
+        try:
+            keyspace = MaskKeyspace(mask, custom_charsets, increment, increment_min, increment_max)
+            start = self._begin_session(AttackMode.MASK, keyspace.spec, restore)
+        except Exception as e:
+            return CrackResult(success=False, error=str(e))
         
-        if estimated > 1000000:
+        print(f"[*] Exact combinations: {keyspace.size:,}")
+        
+        if keyspace.size > 1000000:
             print("[!] WARNING: Over 1 million combinations!")
         
-        # Create password generator
+        return self._crack_with_generator(keyspace.ranges(buffer_size, start), threads, buffer_size,
+                                          AttackMode.MASK, backend, keyspace, start)
+    
+    def crack_markov(self, model_path: str, max_length: int, min_length: int = 1,
+                     threshold: Optional[int] = None, max_level: Optional[int] = None,
+                     threads: int = 4, buffer_size: int = 1000,
+                     backend: Backend = Backend.THREAD, restore: bool = False) -> CrackResult:
+        """Crack using brute force ordered by a trained Markov model, most likely candidates first"""
+        cached = self._check_potfile()
+        if cached is not None:
+            return cached
+        
+        print(f"[*] Starting Markov attack with {threads} {backend.value} workers")
+        print(f"[*] Model: {model_path}, Length: {min_length}-{max_length}"
+              + (f", Threshold: {threshold}" if threshold else "")
+              + (f", Max level: {max_level}" if max_level is not None else ""))
+        
+        try:
+            keyspace = MarkovKeyspace(MarkovModel.load(model_path), min_length, max_length, threshold, max_level)
+            start = self._begin_session(AttackMode.MARKOV, keyspace.spec, restore)
+        except Exception as e:
+            return CrackResult(success=False, error=str(e))
+        
+        print(f"[*] Exact combinations: {keyspace.size:,}")
+        
+        return self._crack_with_generator(keyspace.ranges(buffer_size, start), threads, buffer_size,
+                                          AttackMode.MARKOV, backend, keyspace, start)
+    
+    def crack_hybrid(self, wordlist_path: str, mask: str,
+                     custom_charsets: Optional[List[Optional[str]]] = None, prepend: bool = False,
+                     increment: bool = False, increment_min: Optional[int] = None,
+                     increment_max: Optional[int] = None, threads: int = 4, buffer_size: int = 1000,
+                     backend: Backend = Backend.THREAD, restore: bool = False) -> CrackResult:
+        """Crack using wordlist words with a mask appended (or prepended)"""
+        cached = self._check_potfile()
+        if cached is not None:
+            return cached
+        
+        print(f"[*] Starting hybrid attack with {threads} {backend.value} workers")
+        print(f"[*] Wordlist: {wordlist_path}, Mask: {mask} ({'prepended' if prepend else 'appended'})")
+        
+        wordlist = None
+        try:
+            keyspace = MaskKeyspace(mask, custom_charsets, increment, increment_min, increment_max)
+            wordlist = open_wordlist(wordlist_path)
+            attack = {
+                "wordlist": os.path.abspath(wordlist_path),
+                "size": wordlist.size,
+                "mask": mask,
+                "custom_charsets": list(custom_charsets or []),
+                "min_length": keyspace.min_length,
+                "max_length": keyspace.max_length,
+                "prepend": prepend,
+            }
+            source = HybridWordlist(wordlist, keyspace, prepend)
+            start = self._begin_session(AttackMode.HYBRID, attack, restore)
+        except Exception as e:
+            if wordlist is not None:
+                wordlist.close()
+            return CrackResult(success=False, error=str(e))
+        
+        print(f"[*] Mask candidates per word: {keyspace.size:,}")
+        
+        try:
+            return self._crack_with_generator(source.ranges(buffer_size, start), threads, buffer_size,
+                                              AttackMode.HYBRID, backend, source, start)
+        finally:
+            source.close()
+    
+    def serve(self, mode: AttackMode, keyspace: PositionalKeyspace,
+              listen: Tuple[str, int] = ("0.0.0.0", CLUSTER_PORT), lease_size: int = 1000000,
+              lease_timeout: float = 60.0, chunk_size: int = 1000, restore: bool = False) -> CrackResult:
+        """
+        Coordinate a distributed brute force, mask or Markov attack: lease index ranges of
+        keyspace to `worker` processes over TCP until one finds the password.
+        """
+        cached = self._check_potfile()
+        if cached is not None:
+            return cached
+        
+        print(f"[*] Serving {mode.value} attack on {listen[0]}:{listen[1]}")
+        print(f"[*] Exact combinations: {keyspace.size:,}, lease size: {lease_size:,}")
+        
         try:
-            password_generator = self.wordlist.get_from_length_generator(max_length, charset)
+            if len(self.targets) > 1:
+                raise ValueError("Distributed mode takes a single archive")
+            start = self._begin_session(mode, keyspace.spec, restore)
+            verifier = ZipVerifier(self.zip_path, self.prefilter)
         except Exception as e:
             return CrackResult(success=False, error=str(e))
         
-        return self._crack_with_generator(password_generator, threads, buffer_size, AttackMode.BRUTEFORCE)
+        self._reset_run(start, keyspace.size)
+        leases = LeaseTable(keyspace.ranges(lease_size, start), self._tracker, lease_timeout)
+        coordinator = ClusterCoordinator(verifier, self.fingerprint, mode,
+                                         keyspace.spec, leases, chunk_size)
+        try:
+            server = _ClusterServer(listen, coordinator)
+        except OSError as e:
+            verifier.close()
+            return CrackResult(success=False, error=f"Cannot listen on {listen[0]}:{listen[1]}: {e}")
+        
+        server_thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.2},
+                                         daemon=True)
+        server_thread.start()
+        
+        interrupted = False
+        try:
+            while coordinator.password is None and not leases.finished:
+                time.sleep(0.5)
+                self._total_attempts = coordinator.attempts
+                workers = dict(coordinator.workers)
+                self._worker_ids = list(workers)
+                self._worker_attempts = list(workers.values())
+                self._report_progress()
+                self._checkpoint()
+            
+            # Let connected workers hear the stop before the socket goes away
+            deadline = time.time() + 5.0
+            while server.connections and time.time() < deadline:
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print("\n[*] Interrupted by user")
+            interrupted = True
+        finally:
+            server.shutdown()
+            server.server_close()
+            verifier.close()
+        
+        self._total_attempts = coordinator.attempts
+        if self.verbose:
+            print(f"\n[*] {len(coordinator.workers)} workers took part")
+        
+        if coordinator.password is not None:
+            self._record_find(CrackResult(success=True, password=decode_password(coordinator.password),
+                                          password_bytes=coordinator.password, source=coordinator.found_by))
+        return self._finish_run(None, interrupted)
+    
+    def join_cluster(self, address: Tuple[str, int], processes: int = 1) -> CrackResult:
+        """
+        Work for a coordinator started with serve(): each process holds its own
+        connection and leases. The archive must be a copy of the coordinator's.
+        """
+        print(f"[*] Joining coordinator {address[0]}:{address[1]} with {processes} processes")
+        start_time = time.time()
+        if len(self.targets) > 1:
+            return CrackResult(success=False, error="Distributed mode takes a single archive")
+        
+        ctx = multiprocessing.get_context()
+        result_queue = ctx.Queue()
+        workers = [ctx.Process(target=_cluster_worker,
+                               args=(i + 1, self.zip_path, address, self.prefilter, self.vectorized,
+                                     result_queue),
+                               daemon=True)
+                   for i in range(processes)]
+        for process in workers:
+            process.start()
+        
+        # Every process reports exactly once when the coordinator stops it
+        results = []
+        try:
+            while len(results) < processes:
+                try:
+                    results.append(result_queue.get(timeout=0.5))
+                except queue.Empty:
+                    if not any(process.is_alive() for process in workers):
+                        break
+        except KeyboardInterrupt:
+            print("\n[*] Interrupted by user")
+            for process in workers:
+                process.terminate()
+            return CrackResult(success=False, time_elapsed=time.time() - start_time,
+                               error="Interrupted by user")
+        finally:
+            for process in workers:
+                process.join(timeout=1)
+        
+        attempts = sum(result.attempts for result in results)
+        for result in results:
+            if result.success:
+                result.attempts = attempts
+                result.time_elapsed = time.time() - start_time
+                return result
+        
+        # No error means the coordinator stopped us: found elsewhere or exhausted
+        errors = [result.error for result in results if result.error]
+        return CrackResult(success=False, attempts=attempts, time_elapsed=time.time() - start_time,
+                           error=errors[0] if errors else None)
+    
+    def _collect_attempts(self):
+        """Single aggregator: merge the per-worker counters"""
+        self._total_attempts = sum(self._worker_attempts)
+    
+    def snapshot(self) -> dict:
+        """
+        Current run statistics: attempts and rates overall and per worker,
+        progress and ETA, unit queue depth, and per-stage worker seconds
+        when metrics are enabled.
+        """
+        now = time.time()
+        elapsed = now - self._start_time if self._start_time else 0.0
+        rate = self._total_attempts / elapsed if elapsed > 0 else 0.0
+        
+        # Finished positions: exact for keyspaces and compiled wordlists, bytes of a text wordlist
+        done, total = self._tracker.done, self._progress_total
+        progress = eta = None
+        if total:
+            progress = done / total
+            position_rate = (done - self._tracker.start) / elapsed if elapsed > 0 else 0
+            if position_rate > 0:
+                eta = (total - done) / position_rate
+        
+        queue_depth = None
+        if self._unit_queue is not None:
+            try:
+                queue_depth = self._unit_queue.qsize()
+            except NotImplementedError:
+                # multiprocessing queues on macOS
+                pass
+        
+        stage_seconds = self._stage_seconds
+        stages = {}
+        workers = []
+        for slot, attempts in enumerate(list(self._worker_attempts)):
+            worker = {
+                "id": self._worker_ids[slot] if self._worker_ids else slot + 1,
+                "attempts": attempts,
+                "rate": attempts / elapsed if elapsed > 0 else 0.0,
+            }
+            if stage_seconds is not None:
+                base = slot * len(METRIC_STAGES)
+                worker["stages"] = dict(zip(METRIC_STAGES, stage_seconds[base:base + len(METRIC_STAGES)]))
+                for stage, seconds in worker["stages"].items():
+                    stages[stage] = stages.get(stage, 0.0) + seconds
+            workers.append(worker)
+        
+        return {
+            "time": now,
+            "elapsed": elapsed,
+            "attempts": self._run_attempts,
+            "rate": rate,
+            "position": done,
+            "resume_position": self._tracker.position,
+            "total": total,
+            "progress": progress,
+            "eta": eta,
+            "queue_depth": queue_depth,
+            "found": len(self._finds),
+            "targets": len(self.targets),
+            "stages": stages,
+            "workers": workers,
+        }
+    
+    def _report_progress(self, final: bool = False):
+        """One progress line for all workers at most once a second, metrics every interval"""
+        now = time.time()
+        if not final and now - self._last_report < 1.0:
+            return
+        self._last_report = now
+        if self.metrics is None and (final or not self.verbose):
+            return
+        
+        snapshot = self.snapshot()
+        if self.metrics is not None and (final or self.metrics.due(now)):
+            snapshot["final"] = final
+            self.metrics.write(snapshot)
+        if not self.verbose or final:
+            return
+        
+        line = f"[Progress] {snapshot['attempts']:,} total | {snapshot['rate']:.0f}/sec"
+        if snapshot["progress"] is not None:
+            line += f" | {100 * snapshot['progress']:.1f}%"
+        if snapshot["eta"] is not None:
+            line += f" | ETA {format_duration(snapshot['eta'])}"
+        print(line + " " * 8, end='\r')
     
-    def _crack_with_generator(self, password_generator: Generator, threads: int, 
-                             buffer_size: int, mode: AttackMode) -> CrackResult:
-        """Common cracking logic with generator"""
-        # Reset events and stats
+    def _reset_run(self, start: int, total: int = 0):
+        """Reset events and stats for a new run over positions [start, total)"""
+        self._progress_total = total
+        self._worker_attempts = []
+        self._worker_ids = None
+        self._stage_seconds = None
+        self._unit_queue = None
+        self._shared_stop = None
         self._stop_event.clear()
         self._found_event.clear()
+        self._result_queue = queue.Queue()
         self._total_attempts = 0
         self._start_time = time.time()
+        self._last_checkpoint = self._start_time
+        self._last_report = self._start_time
+        self._tracker = WorkTracker(start)
+        self._cracked = [1 if path in self._finds else 0 for path in self.targets]
+        self._previous_attempts = self._session.attempts if self._session is not None else 0
+        self._previous_elapsed = self._session.elapsed if self._session is not None else 0.0
+    
+    def calibrate(self, source=None, start: int = 0, duration: float = 0.5) -> Calibration:
+        """
+        Short timed trials against the real archives: batch sizes on one
+        thread, then threads and processes on every core. Picks the backend,
+        worker count and batch size with the shortest expected run over source
+        from start, process startup included, so small jobs stay on one thread.
+        source defaults to a throwaway printable brute force slice. Kept in
+        self.calibration; its settings can be passed to any crack_* method.
+        """
+        throwaway = source is None
+        if throwaway:
+            source = BruteForceKeyspace(8, "all", 8)
+            start = source.size // 2
+        remaining = max(0, source.size - start)
+        cores = os.cpu_count() or 1
+        if self.encryption == "aes":
+            sizes = (100, 1000)
+        elif self.vectorized:
+            sizes = (1000, 10000, 100000)
+        else:
+            sizes = (1000, 10000)
+        
+        trials = []
+        
+        def trial(backend: Backend, workers: int, buffer_size: int):
+            args = [(self.targets, self.prefilters, self.vectorized, source, start, buffer_size, i, workers,
+                     duration) for i in range(workers)]
+            began = time.perf_counter()
+            if backend == Backend.THREAD and workers == 1:
+                outcomes = [_calibration_trial(*args[0])]
+            elif backend == Backend.THREAD:
+                outcomes = [None] * workers
+                
+                def run(i):
+                    outcomes[i] = _calibration_trial(*args[i])
+                threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(workers)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            else:
+                ctx = multiprocessing.get_context()
+                result_queue = ctx.Queue()
+                processes = [ctx.Process(target=_calibration_process, args=(args[i], result_queue), daemon=True)
+                             for i in range(workers)]
+                for process in processes:
+                    process.start()
+                outcomes = []
+                deadline = time.perf_counter() + duration + _CALIBRATION_GRACE
+                try:
+                    while len(outcomes) < workers:
+                        try:
+                            outcomes.append(result_queue.get(timeout=0.2))
+                        except queue.Empty:
+                            # A worker that died or hangs would block here for good
+                            if time.perf_counter() > deadline:
+                                raise RuntimeError("a calibration process did not report back")
+                            if not any(process.is_alive() for process in processes):
+                                try:
+                                    outcomes.append(result_queue.get(timeout=0.2))
+                                except queue.Empty:
+                                    raise RuntimeError("a calibration process exited without a result")
+                finally:
+                    for process in processes:
+                        process.join(timeout=1)
+                        if process.is_alive():
+                            process.terminate()
+            wall = time.perf_counter() - began
+            
+            attempts = sum(outcome[0] for outcome in outcomes)
+            positions = sum(outcome[1] for outcome in outcomes)
+            seconds = max(outcome[2] for outcome in outcomes)
+            if not attempts or seconds <= 0:
+                return None
+            rate = attempts / seconds
+            # Startup is whatever the wall clock saw beyond the busy time
+            startup = max(0.0, wall - seconds) if backend == Backend.PROCESS else 0.0
+            measured = {
+                "backend": backend.value,
+                "workers": workers,
+                "buffer_size": buffer_size,
+                "rate": rate,
+                "startup": startup,
+                "expected": startup + remaining * (attempts / positions) / rate,
+            }
+            trials.append(measured)
+            if self.verbose:
+                print(f"[*] Calibrating: {workers} {backend.value} x batch {buffer_size:,}: {rate:,.0f}/sec")
+            return measured
+        
+        # Batch size on one thread; a job that is done in about the time of a trial stops here
+        best = None
+        for size in sizes:
+            measured = trial(Backend.THREAD, 1, size)
+            if measured is None:
+                break
+            if best is None or measured["rate"] > best["rate"] * 1.05:
+                best = measured
+            if measured["expected"] <= 2 * duration:
+                break
+        if best is None:
+            raise RuntimeError("Calibration tried no candidates, cannot open the archives?")
+        
+        candidates = [best]
+        if cores > 1 and best["expected"] > 2 * duration:
+            for backend in (Backend.THREAD, Backend.PROCESS):
+                measured = trial(backend, cores, best["buffer_size"])
+                if measured is not None:
+                    candidates.append(measured)
+        chosen = min(candidates, key=lambda measured: measured["expected"])
         
-        # Create queues
-        password_queue = queue.Queue(maxsize=buffer_size * 2)
+        self.calibration = Calibration(Backend(chosen["backend"]), chosen["workers"], chosen["buffer_size"],
+                                       chosen["rate"], trials)
+        if self.verbose:
+            estimate = "" if throwaway else f", ~{format_duration(chosen['expected'])} for the whole run"
+            print(f"[*] Auto: {chosen['workers']} {chosen['backend']} workers, batch {chosen['buffer_size']:,} "
+                  f"(~{chosen['rate']:,.0f}/sec{estimate})")
+        return self.calibration
+    
+    def crack_async(self, source, start: int = 0, backend: Backend = Backend.THREAD,
+                    executor: Optional[concurrent.futures.Executor] = None,
+                    concurrency: Optional[int] = None, buffer_size: int = 1000) -> CrackJob:
+        """
+        Start cracking with candidates from source (a keyspace or wordlist
+        source) from start, inside the running event loop. Work units run on
+        shared_executor(backend), or executor, with at most concurrency of
+        this job's units in flight (default: twice the CPU count). A process
+        executor gets source once per worker process, not with every unit.
+        Nothing is printed; one job per cracker at a time.
+        """
+        loop = asyncio.get_running_loop()
+        if self._job is not None and not self._job.done():
+            raise RuntimeError("This cracker is already running a job")
+        job = CrackJob(self)
+        job.task = loop.create_task(self._crack_async(
+            job, source, start, executor or shared_executor(backend),
+            concurrency or 2 * (os.cpu_count() or 1), buffer_size))
+        self._job = job
+        return job
+    
+    async def _crack_async(self, job: CrackJob, source, start: int, executor: concurrent.futures.Executor,
+                           concurrency: int, buffer_size: int) -> CrackResult:
+        loop = asyncio.get_running_loop()
+        verbose, self.verbose = self.verbose, False
+        try:
+            cached = await loop.run_in_executor(shared_executor(), self._check_potfile)
+            if cached is not None:
+                return cached
+            
+            self._session = None
+            self._reset_run(start, source.size)
+            units = source.ranges(buffer_size, start)
+            exhausted = False
+            error = None
+            
+            # Worker processes load the source once instead of unpickling it per unit
+            shared = source
+            if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+                shared = await loop.run_in_executor(shared_executor(), _PickledSource, source)
+            try:
+                while True:
+                    remaining = len(self._finds) < len(self.targets)
+                    cracked = [1 if path in self._finds else 0 for path in self.targets]
+                    
+                    # Top up this job's share of the executor, unless it is stopping
+                    stopping = job.cancelled.is_set() or self._stop_event.is_set()
+                    while remaining and not exhausted and not stopping and error is None \
+                            and len(job.in_flight) < concurrency:
+                        unit = next(units, None)
+                        if unit is None:
+                            exhausted = True
+                            break
+                        self._tracker.issue(*unit)
+                        future = loop.run_in_executor(executor, _executor_unit, self.targets, self.prefilters,
+                                                      self.vectorized, shared, cracked, *unit)
+                        job.in_flight[future] = unit[0]
+                    if not job.in_flight:
+                        break
+                    
+                    done, _ = await asyncio.wait(set(job.in_flight), return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        unit_start = job.in_flight.pop(future)
+                        try:
+                            tried, hits = future.result()
+                        except Exception as e:
+                            error = error or f"Worker failed: {e}"
+                            continue
+                        self._total_attempts += tried
+                        self._tracker.finish(unit_start)
+                        for path, password in hits:
+                            self._record_find(CrackResult(success=True, password=decode_password(password),
+                                                          password_bytes=password, archive=path))
+                    self._report_progress()
+            except asyncio.CancelledError:
+                # Hard cancel: drop what has not started, the rest finishes unobserved
+                for future in job.in_flight:
+                    future.cancel()
+                raise
+            finally:
+                # Workers keep the loaded copy, the file is only read by new ones
+                if shared is not source:
+                    shared.remove()
+            
+            stopped = job.cancelled.is_set() or self._stop_event.is_set()
+            if error is None and stopped and len(self._finds) < len(self.targets):
+                error = "Cancelled"
+            self._report_progress(final=True)
+            return await loop.run_in_executor(shared_executor(), self._settle_results,
+                                              self._run_attempts, self._run_elapsed, error)
+        finally:
+            self.verbose = verbose
+    
+    def _crack_with_generator(self, units: Generator, threads: int,
+                             buffer_size: int, mode: AttackMode,
+                             backend: Backend = Backend.THREAD,
+                             source=None, start: int = 0) -> CrackResult:
+        """
+        Common cracking logic with generator.
+        units yields [start, end) ranges of source (a keyspace or mapped wordlist,
+        anything with iter_range), which the workers expand themselves.
+        With autotune the worker settings come from a calibration on source.
+        """
+        if self.autotune and source is not None:
+            try:
+                calibration = self.calibrate(source, start)
+                threads, buffer_size, backend = calibration.workers, calibration.buffer_size, calibration.backend
+                units = source.ranges(buffer_size, start)
+            except Exception as e:
+                if self.verbose:
+                    print(f"[!] Calibration failed, keeping the given settings: {e}")
+        
+        self._reset_run(start, source.size if source is not None else 0)
+        
+        if backend == Backend.PROCESS:
+            return self._crack_with_processes(units, threads, source)
+        
+        self._worker_attempts = [0] * threads
+        if self.metrics is not None:
+            self._stage_seconds = [0.0] * (threads * len(METRIC_STAGES))
+        
+        # Create queue of units
+        unit_queue = queue.Queue(maxsize=threads * 2)
+        self._unit_queue = unit_queue
         
         # Start producer thread
         producer_thread = threading.Thread(
-            target=self._password_producer,
-            args=(password_generator, password_queue, buffer_size),
+            target=self._unit_producer,
+            args=(units, unit_queue, threads, self._found_event),
             daemon=True
         )
         producer_thread.start()
@@ -268,73 +3885,346 @@ class ThreadedZipCracker:
         for i in range(threads):
             thread = threading.Thread(
                 target=self._worker,
-                args=(i + 1, password_queue),
+                args=(i + 1, unit_queue, source),
                 daemon=True
             )
             thread.start()
             worker_threads.append(thread)
         
         # Wait for result
+        result = None
+        worker_error = None
+        interrupted = False
         try:
-            result = self._result_queue.get(timeout=3600 * 24)  # 24 hour timeout
+            while result is None:
+                try:
+                    result = self._result_queue.get(timeout=0.5)
+                except queue.Empty:
+                    if not any(thread.is_alive() for thread in worker_threads):
+                        # Every worker drained the queue without a hit
+                        try:
+                            result = self._result_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                
+                if result is not None and self._false_positive(result):
+                    result = None
+                
+                # A failed worker is not a verdict; its unit is lost, so the run
+                # ends here and the session keeps the position at that unit
+                if result is not None and not result.success:
+                    if self.verbose:
+                        print(f"[Thread {result.thread_id}] Error: {result.error}")
+                    worker_error = result.error
+                    break
+                
+                # Batch runs go on until every archive is cracked
+                if result is not None and not self._record_find(result):
+                    result = None
+                
+                self._collect_attempts()
+                self._report_progress()
+                self._checkpoint()
+        except KeyboardInterrupt:
+            print("\n[*] Interrupted by user")
+            interrupted = True
+        finally:
+            # stop() ended the run early, the workers only left because of it
+            stopped = self._stop_event.is_set()
             self._stop_event.set()
             
             # Wait for threads to finish
             producer_thread.join(timeout=1)
             for thread in worker_threads:
                 thread.join(timeout=1)
-            
-            return result
-            
-        except queue.Empty:
-            self._stop_event.set()
-            return CrackResult(
-                success=False,
-                attempts=self._total_attempts,
-                time_elapsed=time.time() - self._start_time,
-                error="Timeout or no password found"
+        
+        self._drain_finds(self._result_queue)
+        self._collect_attempts()
+        return self._finish_run(worker_error, interrupted, stopped)
+    
+    def _crack_with_processes(self, units: Generator, processes: int,
+                              source=None) -> CrackResult:
+        """Cracking logic that spreads work units across worker processes"""
+        ctx = multiprocessing.get_context()
+        unit_queue = ctx.Queue(maxsize=processes * 2)
+        result_queue = ctx.Queue()
+        done_queue = ctx.Queue()
+        found_event = ctx.Event()
+        self._shared_stop = found_event
+        
+        # One slot per process, each written by its owner only
+        worker_attempts = ctx.Array('q', processes, lock=False)
+        self._worker_attempts = worker_attempts
+        self._unit_queue = unit_queue
+        
+        # Same layout for stage timings, only allocated when metrics are on
+        stage_seconds = None
+        if self.metrics is not None:
+            stage_seconds = ctx.Array('d', processes * len(METRIC_STAGES), lock=False)
+        self._stage_seconds = stage_seconds
+        
+        # Batch runs share which archives are cracked
+        cracked = ctx.Array('b', self._cracked, lock=False)
+        
+        # Start worker processes
+        workers = []
+        for i in range(processes):
+            process = ctx.Process(
+                target=_process_worker,
+                args=(i + 1, self.targets, self.prefilters, self.vectorized, source, unit_queue,
+                      result_queue, done_queue, found_event, worker_attempts, cracked, stage_seconds),
+                daemon=True
             )
+            process.start()
+            workers.append(process)
+        
+        # Feed them from a thread so this one can watch for results
+        producer_thread = threading.Thread(
+            target=self._unit_producer,
+            args=(units, unit_queue, processes, found_event),
+            daemon=True
+        )
+        producer_thread.start()
+        
+        result = None
+        worker_error = None
+        interrupted = False
+        try:
+            while result is None and not self._stop_event.is_set():
+                try:
+                    result = result_queue.get(timeout=0.2)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in workers):
+                        # Every worker drained its share without a hit
+                        try:
+                            result = result_queue.get(timeout=0.2)
+                        except queue.Empty:
+                            break
+                
+                self._drain_done(done_queue)
+                self._collect_attempts()
+                self._report_progress()
+                
+                if result is not None and self._false_positive(result):
+                    result = None
+                
+                # A failed worker is not a verdict; its unit is lost, so the run
+                # ends here and the session keeps the position at that unit
+                if result is not None and not result.success:
+                    if self.verbose:
+                        print(f"[Process {result.thread_id}] Error: {result.error}")
+                    worker_error = result.error
+                    break
+                
+                # Batch runs go on until every archive is cracked
+                if result is not None and not self._record_find(result):
+                    result = None
+                
+                self._checkpoint()
         except KeyboardInterrupt:
             print("\n[*] Interrupted by user")
+            interrupted = True
+        finally:
+            stopped = self._stop_event.is_set()
+            found_event.set()
             self._stop_event.set()
-            return CrackResult(
-                success=False,
-                attempts=self._total_attempts,
-                time_elapsed=time.time() - self._start_time,
-                error="Interrupted by user"
-            )
+            producer_thread.join(timeout=1)
+            for process in workers:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+        
+        self._drain_done(done_queue)
+        self._drain_finds(result_queue)
+        self._collect_attempts()
+        return self._finish_run(worker_error, interrupted, stopped)
+    
+    def _drain_done(self, done_queue):
+        """Mark the units finished by worker processes"""
+        while True:
+            try:
+                self._tracker.finish(done_queue.get_nowait())
+            except queue.Empty:
+                return
+    
+    def _drain_finds(self, result_queue):
+        """Finds that were still queued when the run ended"""
+        while True:
+            try:
+                result = result_queue.get(timeout=0.1)
+            except queue.Empty:
+                return
+            if result.success:
+                self._record_find(result)
+    
+    def _finish_run(self, worker_error: Optional[str], interrupted: bool, stopped: bool = False) -> CrackResult:
+        """Build the final results and settle the session file"""
+        self._report_progress(final=True)
+        error = None
+        if interrupted or stopped and len(self._finds) < len(self.targets):
+            # Keep the checkpoint so --restore can continue from here
+            self._checkpoint(force=True)
+            if self._session is not None and self.verbose:
+                print(f"[*] Session saved to {self._session.path}")
+            error = "Interrupted by user" if interrupted else "Stopped"
+        elif worker_error and len(self._finds) < len(self.targets):
+            # A worker failed, keep the session at the unit it lost
+            self._checkpoint(force=True)
+            error = worker_error
+        elif len(self._finds) < len(self.targets) and self._tracker.position < self._progress_total:
+            # The workers are gone but a unit was never finished, that is not exhaustion
+            self._checkpoint(force=True)
+            error = (f"Workers stopped at position {self._tracker.position:,} of "
+                     f"{self._progress_total:,} before covering the candidate space")
+        elif self._session is not None:
+            # Found or exhausted, nothing left to resume
+            self._session.remove()
+        
+        return self._settle_results(self._run_attempts, self._run_elapsed, error)
+    
+    def _settle_results(self, attempts: int, elapsed: float, error: Optional[str] = None) -> CrackResult:
+        """
+        Per-archive results into self.results: record and extract every find.
+        Returns the archive's result, or for a batch one that succeeds only if
+        every archive was cracked.
+        """
+        self.results = {}
+        for path in self.targets:
+            result = self._finds.get(path)
+            if result is None:
+                self.results[path] = CrackResult(
+                    success=False,
+                    attempts=attempts,
+                    time_elapsed=elapsed,
+                    error=error or "Password not found in candidate space",
+                    archive=path
+                )
+                continue
+            
+            result.attempts = attempts
+            result.time_elapsed = elapsed
+            self.results[path] = self._extract_result(result)
+            
+            # Only a password that extracted the archive goes in the potfile
+            if result.success and result.source != "potfile":
+                self._record_potfile(path, result.password_bytes)
+        
+        if len(self.targets) == 1:
+            return self.results[self.zip_path]
+        
+        cracked = sum(result.success for result in self.results.values())
+        return CrackResult(
+            success=cracked == len(self.targets),
+            attempts=attempts,
+            time_elapsed=elapsed,
+            error=None if cracked == len(self.targets) else
+                  f"Cracked {cracked} of {len(self.targets)} archives" + (f" ({error})" if error else "")
+        )
+    
+    def extract_path_for(self, path: str) -> str:
+        """Where an archive is extracted: extract_path, or a folder per archive in a batch"""
+        if len(self.targets) == 1:
+            return self.extract_path
+        return os.path.join(self.extract_path, os.path.splitext(os.path.basename(path))[0])
+    
+    def _extract_result(self, result: CrackResult) -> CrackResult:
+        """Extract the archive once, after a worker has confirmed the password"""
+        if not result.success:
+            return result
+        
+        path = result.archive or self.zip_path
+        try:
+            verifier = ZipVerifier(path)
+            try:
+                verifier.extract(result.password_bytes, self.extract_path_for(path))
+            finally:
+                verifier.close()
+        except Exception as e:
+            # Not a find if the archive cannot be opened with it
+            result.success = False
+            result.error = f"Password {result.password!r} found but extraction failed: {e}"
+        
+        return result
     
     def stop(self):
         """Stop the cracking process"""
         self._stop_event.set()
+        
+        # Worker processes only see the event shared with them
+        if self._shared_stop is not None:
+            self._shared_stop.set()
 
-class ProgressReporter:
-    """Thread-safe progress reporting"""
-    def __init__(self, update_interval: float = 1.0):
-        self.update_interval = update_interval
-        self._lock = threading.Lock()
-        self._last_update = 0
-        self._attempts = 0
-        self._start_time = time.time()
+class MetricsWriter:
+    """
+    Machine-readable run metrics, written every interval seconds from the
+    snapshots the cracker takes for its progress line: per-stage seconds
+    (candidate generation, queue wait, pre-filter, full verify), per-worker
+    attempts and rates, unit queue depth, progress and ETA. "jsonl" appends
+    one JSON object per snapshot, "prometheus" rewrites a textfile for the
+    node_exporter textfile collector.
+    """
     
-    def increment(self, count: int = 1):
-        with self._lock:
-            self._attempts += count
-            
-            # Throttle updates
-            current_time = time.time()
-            if current_time - self._last_update >= self.update_interval:
-                elapsed = current_time - self._start_time
-                rate = self._attempts / elapsed if elapsed > 0 else 0
-                print(f"[Progress] {self._attempts:,} attempts | {rate:.0f}/sec", end='\r')
-                self._last_update = current_time
-    
-    def get_stats(self):
-        with self._lock:
-            elapsed = time.time() - self._start_time
-            rate = self._attempts / elapsed if elapsed > 0 else 0
-            return {
-                'attempts': self._attempts,
-                'elapsed': elapsed,
-                'rate': rate
-            }
\ No newline at end of file
+    FORMATS = ("jsonl", "prometheus")
+    
+    def __init__(self, path: str, format: str = "jsonl", interval: float = 10.0):
+        if format not in self.FORMATS:
+            raise ValueError(f"Unknown metrics format: {format}")
+        self.path = path
+        self.format = format
+        self.interval = interval
+        self._last_write = 0.0
+    
+    def due(self, now: float) -> bool:
+        return now - self._last_write >= self.interval
+    
+    def write(self, snapshot: dict):
+        self._last_write = snapshot["time"]
+        try:
+            if self.format == "jsonl":
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(snapshot) + "\n")
+            else:
+                # Whole file replaced at once, the collector never sees half of it
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(self.prometheus(snapshot))
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"\n[!] Cannot write metrics to {self.path}: {e}")
+    
+    @staticmethod
+    def prometheus(snapshot: dict) -> str:
+        """Prometheus text exposition of a snapshot"""
+        lines = []
+        
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[str, float]]):
+            lines.append(f"# HELP pwcrack_{name} {help_text}")
+            lines.append(f"# TYPE pwcrack_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"pwcrack_{name}{labels} {value}")
+        
+        metric("attempts_total", "counter", "Candidates tried, including restored sessions",
+               [("", snapshot["attempts"])])
+        metric("rate", "gauge", "Candidates per second in this run", [("", snapshot["rate"])])
+        metric("found", "gauge", "Archives cracked", [("", snapshot["found"])])
+        metric("targets", "gauge", "Archives in the run", [("", snapshot["targets"])])
+        if snapshot["progress"] is not None:
+            metric("progress_ratio", "gauge", "Share of the candidate space finished",
+                   [("", snapshot["progress"])])
+        if snapshot["eta"] is not None:
+            metric("eta_seconds", "gauge", "Estimated seconds left", [("", snapshot["eta"])])
+        if snapshot["queue_depth"] is not None:
+            metric("queue_depth", "gauge", "Work units waiting for a worker", [("", snapshot["queue_depth"])])
+        if snapshot["stages"]:
+            metric("stage_seconds_total", "counter", "Worker seconds per stage",
+                   [(f'{{stage="{stage}"}}', seconds) for stage, seconds in snapshot["stages"].items()])
+        workers = snapshot["workers"]
+        metric("worker_attempts_total", "counter", "Candidates tried per worker",
+               [(f'{{worker="{worker["id"]}"}}', worker["attempts"]) for worker in workers])
+        metric("worker_rate", "gauge", "Candidates per second per worker",
+               [(f'{{worker="{worker["id"]}"}}', worker["rate"]) for worker in workers])
+        if snapshot["stages"]:
+            metric("worker_stage_seconds_total", "counter", "Seconds per stage per worker",
+                   [(f'{{worker="{worker["id"]}",stage="{stage}"}}', seconds)
+                    for worker in workers for stage, seconds in worker["stages"].items()])
+        return "\n".join(lines) + "\n"